@@ -1,127 +1,449 @@
 import streamlit as st
-from st_supabase_connection import SupabaseConnection
-import requests
 import time
-import pandas as pd
 import json
+import os
+import re
+from backend import get_connection
+from scoring import IncrementalScorer
+import coalesce
+from shared_cache import shared_cache, STATE_TTL, QUESTION_TTL
+from question_import import import_questions, DEFAULT_CHUNK_SIZE
+from resilience import run_safe, start_rerun, resilience, is_transient
+from instrument import InstrumentedConnection, metrics
+from notify import hub, start_notifications, publish, mark_rendered, rerun_on_change, WATCHED_TABLES, RESET, LIVE_HEARTBEAT
+from rooms import DEFAULT_ROOM, normalize_room, topic
+from ballot import build_ballot
+from admission import AdmitPolicy, load_allowlist
+from question_bank import QuestionBank, search_questions, build_playlist, next_in_playlist, PAGE_SIZE
+from ui import small_table, leaderboard
+from log_sink import log_sink, BLUFFS_FINALIZED, SCORES_END_ROUND, GAME_STARTED, PLAYER_ADMITTED, PHASE_CHANGED
+from history import GameHistory, load_events, archive_game, load_archive, list_archives
 
 st.set_page_config(page_title="Admin Pro", layout="wide")
-conn = st.connection("supabase", type=SupabaseConnection)
+
+@st.cache_resource
+def app_connection():
+    # Once per process, not per rerun: the backend (Supabase by default;
+    # QUIZ_BACKEND=sqlite runs fully offline, see backend.py), its wrappers, and
+    # the background game_logs writer bound to it (see log_sink.py)
+    conn = InstrumentedConnection(get_connection())
+    log_sink.start(conn)
+    return conn
+
+conn = app_connection()
 
 # ==========================================
 # 🛡️ SAFETY LAYER (Prevents Network Crashes)
 # ==========================================
-def run_safe(operation):
-    """
-    Tries to run a database command. 
-    If it crashes (httpx error), it waits 1 second and tries again.
-    """
-    try:
-        return operation()
-    except Exception:
-        time.sleep(1)
-        try:
-            return operation()
-        except Exception:
-            return None
+# run_safe: retries transient errors with jittered backoff, fails fast
+# while the circuit breaker is open (see resilience.py)
+start_rerun()
+metrics.start_rerun("admin")
+resilience.on_retry = metrics.record_retry
 
 # ==========================================
 # 🧠 HELPER FUNCTIONS
 # ==========================================
+# Everything below is scoped to the room picked in the sidebar (`room`)
 def get_state():
-    def op(): return conn.table("game_state").select("*").eq("id", 1).execute().data[0]
-    return run_safe(op)
+    def op(): return conn.table("game_state").select("*").eq("room_id", room).execute().data[0]
+    return shared_cache.get(("game_state", room), lambda: run_safe(op), ttl=STATE_TTL)
 
-def update_state(updates):
-    def op(): conn.table("game_state").update(updates).eq("id", 1).execute()
-    run_safe(op)
+def get_question(q_id):
+    def op(): return conn.table("questions").select("*").eq("id", q_id).execute().data[0]
+    return shared_cache.get(("questions", room, q_id), lambda: run_safe(op), ttl=QUESTION_TTL)
 
-def log_event(round_id, l_type, data):
+def create_room():
     def op():
-        conn.table("game_logs").insert({
-            "round_id": round_id, "log_type": l_type, "details": json.dumps(data)
-        }).execute()
+        conn.table("game_state").upsert(
+            {"room_id": room, "phase": "LOBBY", "total_players": 2},
+            on_conflict="room_id", ignore_duplicates=True
+        ).execute()
+    run_safe(op)
+    publish(topic(room, "game_state"))
+
+def update_state(updates, round_id=None):
+    def op(): conn.table("game_state").update(updates).eq("room_id", room).execute()
     run_safe(op)
+    if "phase" in updates:
+        log_event(updates.get("current_question_id", round_id), PHASE_CHANGED, {"phase": updates["phase"]})
+    # Every session sees the new phase on its next read
+    publish(topic(room, "game_state"))
+
+def log_event(round_id, l_type, data):
+    # Only queued here; never delays the action that logs it
+    log_sink.log(room, round_id, l_type, data)
+
+@st.cache_resource
+def get_scorer(room_id):
+    # One running scoreboard per room and server process, shared by every session
+    return IncrementalScorer(room_id)
+
+@st.cache_resource
+def get_bank(room_id):
+    # id -> question text, shared by every admin session of the room
+    return QuestionBank(room_id)
+
+@st.cache_resource
+def get_policy(room_id):
+    # Auto-admit rules, shared by every admin session of the room
+    return AdmitPolicy()
+
+def search_bank(text, author, page):
+    # Same search from the 2s refresh loop -> served from the shared cache
+    def op(): return search_questions(conn, room, text, author, page)
+    key = ("bank", room, text.strip().casefold(), author.strip().casefold(), page)
+    result = shared_cache.get(key, lambda: run_safe(op), ttl=QUESTION_TTL)
+    if result is None:
+        return [], 0
+    get_bank(room).remember(result[0])
+    return result
 
 def calculate_scores_snapshot():
-    # --- THIS WAS THE CRASHING FUNCTION. NOW FIXED. ---
-    def op():
-        # Fetch data safely inside the wrapper
-        all_votes = conn.table("player_votes").select("*").execute().data
-        all_inputs = conn.table("player_inputs").select("*").execute().data
-        all_qs = conn.table("questions").select("*").execute().data
-        
-        q_map = {q['id']: q['correct_answer'] for q in all_qs}
-        bluff_map = {(i['question_id'], i['answer_text']): i['user_id'] for i in all_inputs}
-        
-        scores = {}
-        for v in all_votes:
-            voter = v['user_id']
-            qid = v['question_id']
-            choice = v['voted_for']
-            
-            # 1. Init Voter Score
-            scores[voter] = scores.get(voter, 0)
-            
-            # 2. Points for Correct Answer (+10)
-            if choice == q_map.get(qid): 
-                scores[voter] += 10
-            
-            # 3. Points for Bluffing Others (+5)
-            bluffer = bluff_map.get((qid, choice))
-            if bluffer and bluffer != voter:
-                scores[bluffer] = scores.get(bluffer, 0) + 5
-                
-        return scores
-    
-    # Execute safely
+    # Only votes added since the last call are read (see scoring.py)
+    def op(): return get_scorer(room).refresh(conn, hub.version(topic(room, RESET)))
     return run_safe(op)
 
-def nuke_data():
-    def op():
-        # Reset Game State
-        conn.table("game_state").update({"current_question_id": None, "phase": "LOBBY", "total_players": 2}).eq("id", 1).execute()
-        # Delete Children
-        conn.table("player_votes").delete().gt("id", 0).execute()
-        conn.table("player_inputs").delete().gt("id", 0).execute()
-        conn.table("game_logs").delete().gt("id", 0).execute()
-        # Delete Players (except Admin/System if needed, here we wipe all)
-        conn.table("players").delete().neq("user_id", "SYSTEM").execute()
-        # Delete Parents
-        conn.table("questions").delete().gt("id", 0).execute()
-    run_safe(op)
+def start_game(start_id, ids, shuffle):
+    """Freezes the round order into game_state and opens the first question."""
+    if not ids:
+        # No set picked -> the whole bank, in bank order (ids only, once per game)
+        def op(): return conn.table("questions").select("id").eq("room_id", room).order("id").execute().data
+        ids = [r['id'] for r in run_safe(op) or []]
+    playlist, pos = build_playlist(ids, start_id, shuffle)
+    update_state({"phase": "INPUT", "current_question_id": start_id, "playlist": playlist, "playlist_pos": pos})
+    log_event(start_id, GAME_STARTED, {"playlist": playlist, "shuffled": shuffle})
 
-def load_questions_from_github(url):
-    try:
-        resp = requests.get(url)
-        resp.encoding = 'utf-8'
-        content = resp.text
-        if not content: return False
-        
-        lines = content.strip().split('\n')
-        count = 0
-        for line in lines:
-            if "|" in line:
-                parts = line.split("|")
-                q = parts[0].strip()
-                a = "|".join(parts[1:]).strip()
-                if q and a:
-                    conn.table("questions").insert({"question_text": q, "correct_answer": a}).execute()
-                    count += 1
-        return count
-    except: return False
+def nuke_data(archive=True):
+    """
+    Wipes the room, after writing it to a local archive (see history.py).
+    Returns (wiped, archive path or None); nothing is deleted if archiving fails.
+    """
+    path = None
+    # This game's events must land before the archive and the wipe, not in the
+    # fresh room after it: our own writer is flushed, without waiting on the
+    # player servers' writers (other processes). Their last few seconds of
+    # events can miss the archive; its votes and bluffs come from the tables.
+    log_sink.flush()
+    if archive:
+        path = run_safe(lambda: archive_game(conn, room))
+        if path is None:
+            return False, None
+
+    wiped = None
+    if not st.session_state.get("no_reset_rpc"):
+        # One transaction, one round trip (sql/reset_room.sql); safe to retry
+        def op():
+            try:
+                conn.client.rpc("reset_room", {"p_room_id": room}).execute()
+                return True
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                # Function not installed -> table by table for the rest of this session
+                st.session_state.no_reset_rpc = True
+        wiped = run_safe(op)
+    if st.session_state.get("no_reset_rpc"):
+        wiped = run_safe(delete_room_rows)
+    if not wiped:
+        return False, path
+    get_scorer(room).reset()
+    get_bank(room).clear()
+    st.session_state.evening = []
+    st.session_state.pop("history", None)
+    publish(*[topic(room, t) for t in WATCHED_TABLES], topic(room, RESET))
+    return True, path
+
+def delete_room_rows():
+    # Fallback for nuke_data without the reset_room function: table by table
+    # Reset Game State
+    conn.table("game_state").update({
+        "current_question_id": None, "phase": "LOBBY", "total_players": 2, "playlist": [], "playlist_pos": 0
+    }).eq("room_id", room).execute()
+    # Delete Children
+    conn.table("player_votes").delete().eq("room_id", room).execute()
+    conn.table("ballot_options").delete().eq("room_id", room).execute()
+    conn.table("player_inputs").delete().eq("room_id", room).execute()
+    conn.table("game_logs").delete().eq("room_id", room).execute()
+    # Delete Players (only this room's)
+    conn.table("players").delete().eq("room_id", room).execute()
+    # Delete Parents
+    conn.table("questions").delete().eq("room_id", room).execute()
+    return True
+
+def load_questions(source, chunk_size, on_chunk=None):
+    # Streams the file and inserts in bulk chunks, skipping questions already in the bank.
+    # A failure stops the import but keeps its report (chunks already inserted stay).
+    report = import_questions(conn, source, chunk_size=chunk_size, on_chunk=on_chunk, room=room, runner=run_safe)
+    if report['inserted']:
+        publish(topic(room, "questions"))
+    return report
+
+def finalize_bluffs(round_id, inputs, edited_data):
+    """
+    Writes only the bluffs the admin actually changed, stores the round's
+    ballot (see ballot.py), then logs and starts voting.
+    Uses the finalize_bluffs RPC (sql/finalize_bluffs.sql) so all of it happens
+    in one atomic round trip; falls back to separate bulk writes when the
+    function isn't installed. Returns False if nothing could be saved.
+    """
+    changed = [
+        {**row, "answer_text": edited_data[row['id']]}
+        for row in inputs
+        if edited_data.get(row['id'], row['answer_text']) != row['answer_text']
+    ]
+    q = get_question(round_id)
+    if not q:
+        st.error("Couldn't load the question, try again.")
+        return False
+    final = [{**row, "answer_text": edited_data.get(row['id'], row['answer_text'])} for row in inputs]
+    ballot = build_ballot(q['correct_answer'], final)
+    # The ballot goes into the event too, so votes can be replayed from game_logs alone
+    details = {
+        "edits": [{"id": r['id'], "user_id": r['user_id'], "answer_text": r['answer_text']} for r in changed],
+        "ballot": ballot,
+    }
+
+    if not st.session_state.get("no_finalize_rpc"):
+        def op():
+            try:
+                conn.client.rpc("finalize_bluffs", {
+                    "p_room_id": room,
+                    "p_question_id": round_id,
+                    "p_edits": {str(r['id']): r['answer_text'] for r in changed},
+                    "p_details": json.dumps(details),
+                    "p_ballot": ballot,
+                }).execute()
+                return True
+            except Exception as e:
+                # Network / busy: retried by run_safe (the function is a no-op once the round is in VOTING)
+                if is_transient(e):
+                    raise
+                # Function not installed -> separate writes for the rest of this session
+                st.session_state.no_finalize_rpc = True
+        done = run_safe(op)
+        if not st.session_state.get("no_finalize_rpc"):
+            if not done:
+                # It may or may not have committed; pressing the button again is safe either way
+                st.error("Couldn't reach the database, try again.")
+                return False
+            log_event(round_id, PHASE_CHANGED, {"phase": "VOTING"})
+            publish(topic(room, "game_state"), topic(room, "player_inputs"))
+            return True
+
+    if changed:
+        def op(): conn.table("player_inputs").upsert(changed).execute()
+        run_safe(op)
+    def store_ballot():
+        conn.table("ballot_options").delete().eq("question_id", round_id).execute()
+        conn.table("ballot_options").insert([{"room_id": room, "question_id": round_id, **o} for o in ballot]).execute()
+    run_safe(store_ballot)
+    log_event(round_id, BLUFFS_FINALIZED, details)
+    update_state({"phase": "VOTING"}, round_id)
+    publish(topic(room, "player_inputs"))
+    return True
 
 def get_pending_players():
-    def op(): return conn.table("players").select("*").eq("status", "PENDING").execute().data
+    # The join queue, oldest first
+    def op():
+        return (conn.table("players").select("user_id, created_at")
+                .eq("room_id", room).eq("status", "PENDING").order("created_at").execute().data)
     return run_safe(op) or []
 
 def get_approved_players():
-    def op(): return conn.table("players").select("*").eq("status", "APPROVED").execute().data
+    def op(): return conn.table("players").select("*").eq("room_id", room).eq("status", "APPROVED").execute().data
     return run_safe(op) or []
 
+def count_rows(table, **filters):
+    # Exact count computed by the server; no rows come back over the wire
+    def op():
+        q = conn.table(table).select("*", count="exact", head=True)
+        for col, val in filters.items():
+            q = q.eq(col, val)
+        return q.execute().count
+    return run_safe(op) or 0
+
+def count_approved_players():
+    return count_rows("players", room_id=room, status="APPROVED")
+
+def admit_players(uids, rule=None):
+    """Admits any number of pending players with one UPDATE; returns who was admitted."""
+    if not uids:
+        return []
+    def op():
+        return (conn.table("players").update({"status": "APPROVED"})
+                .eq("room_id", room).eq("status", "PENDING").in_("user_id", list(uids)).execute().data)
+    admitted = [r['user_id'] for r in run_safe(op) or []]
+    for uid in admitted:
+        details = {"user_id": uid}
+        if rule:
+            details["rule"] = rule
+        log_event(None, PLAYER_ADMITTED, details)
+    if admitted:
+        publish(topic(room, "players"), *[topic(room, f"players:{uid}") for uid in admitted])
+    return admitted
+
 def approve_player(uid):
-    def op(): conn.table("players").update({"status": "APPROVED"}).eq("user_id", uid).execute()
-    run_safe(op)
+    admit_players([uid])
+
+def admit_selected():
+    admit_players(st.session_state.get("admit_pick", []))
+
+# ==========================================
+# 🧩 LIVE PANELS
+# ==========================================
+# Each panel is a fragment: it refreshes on its own timer and only its own
+# part of the page reruns. Static controls (import, bank, forms) never rerun
+# from the refresh loop, so half-typed input stays put.
+
+def panel_data(key, topics, every, loader):
+    """
+    A panel's data, kept in session_state between fragment runs. Reloaded only
+    when one of `topics` changed or it is `every` seconds old (LIVE_HEARTBEAT
+    while realtime is connected); otherwise the fragment just redraws it.
+    """
+    panels = st.session_state.setdefault("panels", {})
+    entry = panels.get(key)
+    now = time.monotonic()
+    if entry is not None:
+        value, seen, loaded_at = entry
+        if not hub.changed_since(seen, topics) and now - loaded_at < (LIVE_HEARTBEAT if hub.live else every):
+            return value
+    # A fragment run is a rerun of its own: fresh retry budget, own metrics record
+    start_rerun()
+    metrics.start_rerun("admin")
+    seen = hub.snapshot()
+    value = loader()
+    panels[key] = (value, seen, now)
+    return value
+
+@st.fragment(run_every=2)
+def standings_panel():
+    curr_scores = panel_data(("standings", room), [topic(room, "player_votes")], 5, calculate_scores_snapshot)
+    if curr_scores:
+        leaderboard(curr_scores)
+    else:
+        st.write("No points yet.")
+
+@st.fragment(run_every=5)
+def logs_panel():
+    def load():
+        def fetch_logs():
+            return conn.table("game_logs").select("*").eq("room_id", room).order("created_at", desc=True).limit(20).execute().data
+        logs = run_safe(fetch_logs)
+        # Serialized once per reload, not on every redraw
+        return logs, json.dumps(logs) if logs else None
+    logs, logs_json = panel_data(("logs", room), [], 10, load)
+    if logs:
+        st.write(logs)
+        st.download_button("Download Logs JSON", logs_json, "game_logs.json")
+    sink = log_sink.stats()
+    st.caption(f"Log writer: {sink['written']} written in {sink['batches']} batch(es), {sink['pending']} queued, "
+               f"{sink['spooled']} spooled" + (" (spool file waiting)" if sink['spool'] else ""))
+    cache_stats = shared_cache.stats()
+    st.caption(f"Read cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses (v{cache_stats['version']}), "
+               f"{cache_stats['coalesced'] + coalesce.reads.stats()['shared']} duplicate reads coalesced")
+    net = resilience.stats()
+    st.caption(f"Backend: {net['calls']} calls, {net['retries']} retries, {net['failures']} failures, "
+               f"{net['short_circuits']} fast-fails, avg {net['latency_avg'] * 1000:.0f} ms, circuit {net['breaker']}")
+
+def history_panel():
+    """Replays scores / who fooled whom per round from the event log or an archive."""
+    sources = ["This game"] + list_archives()
+    source = st.selectbox("Source", sources, format_func=os.path.basename)
+    if st.button("Load history"):
+        def load():
+            if source == "This game":
+                log_sink.flush()
+                return load_events(conn, room)
+            return load_archive(source)["tables"]["game_logs"]
+        events = run_safe(load)
+        st.session_state.history = GameHistory(events) if events is not None else None
+    history = st.session_state.get("history")
+    if not history:
+        return
+    if not history.rounds:
+        st.info("No rounds in this log yet.")
+        return
+    st.caption(f"{history.events} events · {len(history.rounds)} round(s) · {len(history.snapshots)} snapshot(s)")
+    round_id = st.selectbox("After round", history.rounds,
+                            format_func=lambda r: f"{history.rounds.index(r) + 1}. {get_bank(room).label(r)}")
+    leaderboard(history.scores_at(round_id))
+    fooled = history.who_fooled_whom(round_id)
+    for bluffer, voters in fooled.items():
+        st.write(f"🎭 **{bluffer}** fooled {', '.join(voters)}")
+
+ADMIT_BUTTONS = 10   # one-click rows in the Admission Gate; the rest via multiselect / Admit all
+
+@st.fragment(run_every=1)
+def admission_panel():
+    def load(): return get_pending_players(), count_approved_players(), (get_state() or {}).get('total_players')
+    topics = [topic(room, "players"), topic(room, "game_state")]
+    pending, approved, cap = panel_data(("admission", room), topics, 2, load)
+
+    # Auto-admit: the whole matching part of the queue in one update (nothing to do without a queue)
+    policy = get_policy(room)
+    picked = policy.select(pending, approved, cap) if pending else []
+    if picked and admit_players(picked, rule="auto"):
+        pending, approved, cap = panel_data(("admission", room), topics, 2, load)
+
+    st.metric("Approved Players", approved)
+    st.caption(policy.describe())
+    
+    if pending:
+        names = [p['user_id'] for p in pending]
+        st.warning(f"{len(pending)} Pending Requests:")
+        st.button(f"✅ Admit all ({len(names)})", on_click=admit_players, args=(names,))
+        for uid in names[:ADMIT_BUTTONS]:
+            col_p1, col_p2 = st.columns([3, 1])
+            col_p1.write(f"**{uid}**")
+            # Runs before the panel redraws, which then reloads (players topic moved)
+            col_p2.button("Admit", key=f"admit_{uid}", on_click=approve_player, args=(uid,))
+        if len(names) > ADMIT_BUTTONS:
+            st.caption(f"... and {len(names) - ADMIT_BUTTONS} more")
+            st.multiselect("Pick players", names, key="admit_pick")
+            st.button("Admit selected", on_click=admit_selected)
+    else:
+        st.info("No pending requests.")
+
+@st.fragment(run_every=1)
+def submissions_panel(q_id):
+    submitted_count, total_players = panel_data(
+        ("submissions", room, q_id), [topic(room, "player_inputs"), topic(room, "players")], 2,
+        lambda: (count_rows("player_inputs", question_id=q_id), count_approved_players())
+    )
+    if submitted_count >= total_players:
+        # Everyone is in -> full rerun once to unlock the edit form
+        st.rerun()
+    
+    st.metric("Submissions", f"{submitted_count} / {total_players}")
+    st.warning(f"⚠️ Waiting for {total_players - submitted_count} more player(s)...")
+    st.info("Editing will unlock automatically when everyone has submitted.")
+    
+    # Show who has finished so you can yell at slow players (fetched on demand)
+    if submitted_count and st.toggle("Show who has submitted"):
+        def get_names(): return conn.table("player_inputs").select("user_id").eq("question_id", q_id).execute().data
+        submitted_names = [i['user_id'] for i in run_safe(get_names) or []]
+        st.write(f"✅ **Received:** {', '.join(submitted_names)}")
+
+@st.fragment(run_every=1)
+def votes_panel(q_id):
+    votes_cast, total_players = panel_data(
+        ("votes", room, q_id), [topic(room, "player_votes"), topic(room, "players")], 2,
+        lambda: (count_rows("player_votes", question_id=q_id), count_approved_players())
+    )
+    st.metric("Votes Cast", f"{votes_cast} / {total_players}")
+    
+    if votes_cast >= total_players:
+        st.success("All votes in!")
+        if st.button("Reveal Results"):
+            # Log Scores Snapshot (skipped if the scores couldn't be read; replays recompute them)
+            scores = calculate_scores_snapshot()
+            if scores is not None:
+                log_event(q_id, SCORES_END_ROUND, scores)
+            
+            update_state({"phase": "RESULTS"}, q_id)
+            st.rerun()
 
 # ==========================================
 # 🔒 AUTHENTICATION
@@ -134,65 +456,155 @@ if 'admin_logged_in' not in st.session_state:
             st.rerun()
     st.stop()
 
+# Change notifications (publish / rerun_on_change): see notify.py
+start_notifications(conn)
+mark_rendered()
+
 # ==========================================
 # 🕹️ SIDEBAR (Leaderboard & Logs)
 # ==========================================
 with st.sidebar:
-    st.header("🏆 Live Standings")
-    
-    # Calculate scores safely now
-    curr_scores = calculate_scores_snapshot()
+    room = normalize_room(st.text_input("🚪 Room code", value=st.session_state.get("room", DEFAULT_ROOM)))
+    st.session_state.room = room
+    st.caption(f"Players join room **{room}** (or open the player app with `?room={room}`).")
+    view = st.radio("View", ["🎮 Game", "📈 Season stats"], horizontal=True)
     
-    if curr_scores:
-        df = pd.DataFrame(list(curr_scores.items()), columns=["Player", "Score"])
-        df = df.sort_values("Score", ascending=False)
-        st.dataframe(df, hide_index=True, use_container_width=True)
-    else:
-        st.write("No points yet.")
+    st.header("🏆 Live Standings")
+    standings_panel()
         
     st.divider()
     
     with st.expander("System Logs"):
-        def fetch_logs():
-            return conn.table("game_logs").select("*").order("created_at", desc=True).limit(20).execute().data
-        logs = run_safe(fetch_logs)
-        if logs:
-            st.write(logs)
-            st.download_button("Download Logs JSON", json.dumps(logs), "game_logs.json")
+        logs_panel()
+
+    with st.expander("Performance"):
+        # Queries per helper across every session of every server process (admin + player apps)
+        perf = metrics.combined()
+        st.caption(f"{perf['processes']} server process(es)")
+        for app_name, a in perf["apps"].items():
+            st.caption(f"{app_name}: {a['reruns']} reruns, {a['queries_per_rerun']} queries/rerun "
+                       f"(max {a['max_queries']}), {a['db_ms_per_rerun']} ms in DB/rerun")
+        small_table(metrics.helper_rows(perf))
+        perf["cache"] = shared_cache.stats()
+        perf["backend"] = resilience.stats()
+        st.download_button("Download Performance JSON", json.dumps(perf), "performance.json")
+        if st.button("Reset counters"):
+            metrics.reset_all()
+
+    with st.expander("📜 Game History"):
+        history_panel()
 
     with st.expander("Danger Zone"):
         reset_pwd = st.text_input("Reset Password", type="password")
+        keep_archive = st.checkbox("Archive the game to a local file first", value=True)
         if st.button("☢️ HARD RESET"):
             if reset_pwd == st.secrets["admin"]["password"]:
-                nuke_data()
-                st.success("Game Wiped.")
-                time.sleep(1)
-                st.rerun()
+                wiped, path = nuke_data(archive=keep_archive)
+                if keep_archive and path is None:
+                    st.error("Couldn't archive the game; nothing was deleted.")
+                elif not wiped:
+                    st.error("Couldn't reach the database to wipe the game, try again."
+                             + (f" (Archived to {path}.)" if path else ""))
+                else:
+                    st.success(f"Game Wiped. Archived to {path}" if path else "Game Wiped.")
+                    time.sleep(1)
+                    st.rerun()
             else:
                 st.error("Wrong Password")
 
+# ==========================================
+# 📈 SEASON STATS (archived games, see analytics.py)
+# ==========================================
+@st.cache_data(show_spinner="Loading archived games...")
+def archived_frames(archives):
+    # archives: ((path, mtime), ...) so a new or rewritten archive misses the cache
+    from analytics import archive_frames
+    return [archive_frames(path) for path, _ in archives]
+
+def stats_page():
+    # pandas / NumPy are only imported once somebody opens this page
+    from analytics import table_frames, season_frames, season_stats
+    st.title("📈 Season Stats")
+    archives = tuple((p, os.path.getmtime(p)) for p in list_archives())
+    include_live = st.checkbox(f"Include the running game (room {room})")
+    frame_sets = list(archived_frames(archives))
+    if include_live:
+        def op():
+            return {t: conn.table(t).select("*").eq("room_id", room).execute().data
+                    for t in ("questions", "player_inputs", "ballot_options", "player_votes")}
+        tables = run_safe(op)
+        if tables:
+            frame_sets.append(table_frames(tables, f"{room} (live)"))
+    if not frame_sets:
+        st.info("No archived games yet. A Hard Reset archives the finished game (see Danger Zone).")
+        return
+
+    season = season_frames(frame_sets)
+    stats = season_stats(season)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Games", len(frame_sets))
+    c2.metric("Rounds", len(season["questions"]))
+    c3.metric("Votes", len(season["player_votes"]))
+
+    st.subheader("🎭 Bluff success per author")
+    st.dataframe(stats["bluffs"], hide_index=True, column_config={
+        "success_rate": st.column_config.ProgressColumn("Success rate", min_value=0.0, max_value=1.0, format="percent"),
+    })
+    st.subheader("🧠 Questions by how often they're answered correctly")
+    st.dataframe(stats["questions"], hide_index=True, column_config={
+        "accuracy": st.column_config.ProgressColumn("Accuracy", min_value=0.0, max_value=1.0, format="percent"),
+    })
+    st.subheader("🤝 Most fooled pairs")
+    st.dataframe(stats["pairs"], hide_index=True)
+
+if view == "📈 Season stats":
+    stats_page()
+    st.stop()
+
 # ==========================================
 # 🚀 MAIN DASHBOARD
 # ==========================================
-st.title("🛡️ Admin Console")
+st.title(f"🛡️ Admin Console · Room {room}")
 
 state = get_state()
 if not state:
-    st.warning("Connecting...")
+    if resilience.breaker.state != "CLOSED":
+        st.error("Backend unreachable, retrying shortly...")
+    else:
+        st.info(f"Room **{room}** has no game yet.")
+        if st.button("➕ Create Room"):
+            create_room()
+            st.rerun()
     st.stop()
 
 phase = state['phase']
 q_id = state['current_question_id']
+if phase != "LOBBY" and state.get('playlist'):
+    st.caption(f"Round {state['playlist_pos'] + 1} of {len(state['playlist'])}")
 
 # 1. LOBBY (Admission Control)
 if phase == "LOBBY":
     c1, c2 = st.columns(2)
     with c1:
         st.subheader("⚙️ Setup")
-        gh_url = st.text_input("GitHub Raw URL (.txt)")
+        gh_url = st.text_input("GitHub Raw URL or local file (.txt)")
+        chunk_size = st.number_input("Rows per insert", min_value=1, value=DEFAULT_CHUNK_SIZE)
         if st.button("📥 Import Questions"):
-            count = load_questions_from_github(gh_url)
-            if count: st.success(f"Loaded {count} questions!")
+            progress = st.empty()
+            def show_progress(rep):
+                progress.info(f"Chunk {len(rep['chunks'])}: {rep['inserted']} questions inserted...")
+            report = load_questions(gh_url, int(chunk_size), on_chunk=show_progress)
+            summary = (f"{report['inserted']} questions in {len(report['chunks'])} batch(es), "
+                       f"skipped {report['duplicates']} duplicate(s)")
+            if report['error']:
+                st.error(f"Import stopped: {report['error']} (check the URL / path). "
+                         f"Saved so far: {summary}; importing again only adds the rest.")
+            else:
+                st.success(f"Loaded {summary}.")
+            if report['rejected']:
+                with st.expander(f"⚠️ {len(report['rejected'])} rejected line(s)"):
+                    for no, line in report['rejected']:
+                        st.text(f"{no}: {line}")
         
         # Safe Input for Players
         db_val = state.get('total_players', 0)
@@ -203,59 +615,96 @@ if phase == "LOBBY":
             update_state({"total_players": tot})
             st.success("Saved.")
             
-        # Question Picker
-        def get_qs(): return conn.table("questions").select("*").execute().data
-        qs = run_safe(get_qs)
+        # Question Picker: tonight's set if there is one, else the bank page below
+        bank = get_bank(room)
+        evening = st.session_state.setdefault("evening", [])
+        rows, total = search_bank(st.session_state.get("bank_text", ""), st.session_state.get("bank_author", ""),
+                                  st.session_state.get("bank_page", 0))
+        choices = evening or [r['id'] for r in rows]
         
-        if qs:
+        if choices:
             st.divider()
-            selected = st.selectbox("Start Question", [q['id'] for q in qs], format_func=lambda x: next((i['question_text'] for i in qs if i['id'] == x), x))
+            selected = st.selectbox("Start Question", choices, format_func=bank.label)
+            shuffle = st.checkbox("Shuffle the remaining rounds")
+            st.caption(f"Rounds: {len(evening)} picked question(s)" if evening else "Rounds: the whole bank")
             if st.button("🚀 START GAME"):
-                update_state({"phase": "INPUT", "current_question_id": selected})
+                start_game(selected, evening, shuffle)
                 st.rerun()
     
     with c2:
         st.subheader("🚪 Admission Gate")
-        pending = get_pending_players()
-        approved = get_approved_players()
-        
-        st.metric("Approved Players", len(approved))
-        
-        if pending:
-            st.warning(f"{len(pending)} Pending Requests:")
-            for p in pending:
-                col_p1, col_p2 = st.columns([3, 1])
-                col_p1.write(f"**{p['user_id']}**")
-                if col_p2.button("Admit", key=f"admit_{p['user_id']}"):
-                    approve_player(p['user_id'])
-                    st.rerun()
+        with st.expander("🤖 Auto-admit rules"):
+            policy = get_policy(room)
+            auto_on = st.toggle("Admit matching players automatically", value=policy.enabled)
+            allow_src = st.text_input("Allowlist: GitHub Raw URL or local file (.txt), one name per line")
+            pattern = st.text_input("Name pattern (regex, whole name)", value=policy.pattern)
+            use_cap = st.checkbox("Stop at Max Players", value=policy.use_cap)
+            if st.button("Save rules"):
+                try:
+                    allowlist = load_allowlist(allow_src) if allow_src.strip() else None
+                    policy.configure(auto_on, pattern, use_cap, allowlist)
+                    st.success(policy.describe())
+                except re.error as e:
+                    st.error(f"Invalid pattern: {e}")
+                except Exception:
+                    st.error("Couldn't read the allowlist (check the URL / path).")
+        admission_panel()
+    
+    # Question Bank: server-side search + paging, pick tonight's set from it
+    st.divider()
+    st.subheader("📚 Question Bank")
+    
+    def set_bank_page(page):
+        st.session_state.bank_page = page
+    
+    def toggle_pick(pick_id):
+        if pick_id in st.session_state.evening:
+            st.session_state.evening.remove(pick_id)
         else:
-            st.info("No pending requests.")
+            st.session_state.evening.append(pick_id)
+    
+    s1, s2 = st.columns([2, 1])
+    s1.text_input("Search questions", key="bank_text", on_change=set_bank_page, args=(0,))
+    s2.text_input("Author", key="bank_author", on_change=set_bank_page, args=(0,), placeholder="e.g. Andreas")
+    
+    page = st.session_state.get("bank_page", 0)
+    pages = max(1, -(-total // PAGE_SIZE))
+    st.caption(f"{total} question(s) · page {page + 1} of {pages} · {len(evening)} picked for tonight")
+    for r in rows:
+        col_q, col_b = st.columns([6, 1])
+        col_q.write(r['question_text'])
+        col_b.button("✓ Picked" if r['id'] in evening else "➕ Pick", key=f"pick_{r['id']}",
+                     on_click=toggle_pick, args=(r['id'],))
+    
+    p1, p2, p3 = st.columns([1, 1, 4])
+    p1.button("◀ Prev", disabled=page == 0, on_click=set_bank_page, args=(page - 1,))
+    p2.button("Next ▶", disabled=page + 1 >= pages, on_click=set_bank_page, args=(page + 1,))
+    
+    if evening:
+        with st.expander(f"🌙 Tonight's set ({len(evening)})"):
+            run_safe(lambda: bank.ensure(conn, evening))
+            for n, pick_id in enumerate(evening, 1):
+                col_q, col_b = st.columns([6, 1])
+                col_q.write(f"{n}. {bank.label(pick_id)}")
+                col_b.button("✖", key=f"unpick_{pick_id}", on_click=toggle_pick, args=(pick_id,))
+            if st.button("Clear set"):
+                st.session_state.evening = []
+                st.rerun()
 
 # 2. INPUT (Moderation)
 elif phase == "INPUT":
     st.subheader("📝 Moderation Phase")
     
-    # 1. Fetch Data
+    # 1. Progress (server-side counts only)
     def get_inputs(): return conn.table("player_inputs").select("*").eq("question_id", q_id).execute().data
-    inputs = run_safe(get_inputs) or []
-    
-    approved = get_approved_players()
-    total_players = len(approved)
-    submitted_count = len(inputs)
     
-    st.metric("Submissions", f"{submitted_count} / {total_players}")
+    total_players = count_approved_players()
+    submitted_count = count_rows("player_inputs", question_id=q_id)
     
     # 2. CHECK: Is everyone finished?
     if submitted_count < total_players:
-        # CASE A: Still Waiting -> Block Editing
-        st.warning(f"⚠️ Waiting for {total_players - submitted_count} more player(s)...")
-        st.info("Editing will unlock automatically when everyone has submitted.")
-        
-        # Show who has finished so you can yell at slow players
-        if inputs:
-            submitted_names = [i['user_id'] for i in inputs]
-            st.write(f"✅ **Received:** {', '.join(submitted_names)}")
+        # CASE A: Still Waiting -> Block Editing (the panel refreshes itself)
+        submissions_panel(q_id)
             
         # Optional: "Force Unlock" button in case a player disconnects/leaves
         if st.button("⚠️ Force Unlock (Someone left)"):
@@ -265,8 +714,12 @@ elif phase == "INPUT":
 
     else:
         # CASE B: Everyone Finished (or Forced) -> Show Edit Form
+        st.metric("Submissions", f"{submitted_count} / {total_players}")
         st.success("🎉 All answers received! You may now edit and start voting.")
         
+        # Full rows are only needed for the edit form
+        inputs = run_safe(get_inputs) or []
+        
         with st.form("mod_form"):
             st.write("Edit bluffs before voting (Fix typos):")
             edited_data = {}
@@ -281,61 +734,37 @@ elif phase == "INPUT":
                 edited_data[row['id']] = val
                 
             if st.form_submit_button("✅ Save & Start Voting"):
-                # Update DB
-                for db_id, new_text in edited_data.items():
-                    def update_op(did=db_id, txt=new_text):
-                        conn.table("player_inputs").update({"answer_text": txt}).eq("id", did).execute()
-                    run_safe(update_op)
-                
-                # Log Event
-                log_event(q_id, "BLUFFS_FINALIZED", edited_data)
-                
-                update_state({"phase": "VOTING"})
-                st.rerun()
+                if finalize_bluffs(q_id, inputs, edited_data):
+                    st.rerun()
 
 # 3. VOTING
 elif phase == "VOTING":
     st.subheader("🗳️ Voting in Progress")
-    
-    def get_votes(): return conn.table("player_votes").select("*").eq("question_id", q_id).execute().data
-    votes = run_safe(get_votes) or []
-    
-    approved = get_approved_players()
-    st.metric("Votes Cast", f"{len(votes)} / {len(approved)}")
-    
-    if len(votes) >= len(approved):
-        st.success("All votes in!")
-        if st.button("Reveal Results"):
-            # Log Scores Snapshot
-            scores = calculate_scores_snapshot()
-            log_event(q_id, "SCORES_END_ROUND", scores)
-            
-            update_state({"phase": "RESULTS"})
-            st.rerun()
+    votes_panel(q_id)
 
 # 4. RESULTS
 elif phase == "RESULTS":
     st.subheader("📊 Results & Reveal")
     st.success("Results are live on player screens.")
     
-    def get_all_qs(): return conn.table("questions").select("*").execute().data
-    qs = run_safe(get_all_qs) or []
-    
-    curr_idx = next((i for i, q in enumerate(qs) if q["id"] == q_id), -1)
+    # O(1) from the playlist; loading it now also warms the cache for the next INPUT phase
+    next_id, next_pos = next_in_playlist(state)
+    next_q = get_question(next_id) if next_id else None
     
-    if curr_idx + 1 < len(qs):
-        next_q = qs[curr_idx + 1]
-        if st.button(f"⏭️ Next: {next_q['question_text']}"):
-            update_state({"phase": "INPUT", "current_question_id": next_q['id']})
+    if next_id:
+        next_label = next_q['question_text'] if next_q else f"#{next_id}"
+        if st.button(f"⏭️ Next: {next_label}"):
+            update_state({"phase": "INPUT", "current_question_id": next_id, "playlist_pos": next_pos})
             st.rerun()
     else:
         st.balloons()
         st.write("🎉 Game Over! Final scores are in the sidebar.")
         if st.button("Return to Lobby"):
-            update_state({"phase": "LOBBY"})
+            update_state({"phase": "LOBBY"}, q_id)
             st.rerun()
 
-time.sleep(2)
-st.rerun()
+# The panels refresh themselves; the whole page only reruns when the phase moves
+# (or as a slow safety net while realtime isn't connected)
+rerun_on_change([topic(room, "game_state")], fallback=10)
 
 
@@ -0,0 +1,77 @@
+import re
+import threading
+
+from question_import import iter_lines
+
+# ==========================================
+# 🚪 ADMISSION (bulk admit + auto-admit rules)
+# ==========================================
+# Joining players wait in the players table as PENDING rows, oldest first;
+# that's the queue. The admin drains it in bulk (one UPDATE for any number
+# of players) and, with an AdmitPolicy switched on, the Admission Gate
+# admits matching players on its own every time it refreshes:
+#   - allowlist: nicknames from a file (one per line, "#" comments),
+#     compared case-insensitively
+#   - pattern:   a regular expression the whole nickname must match
+#   - cap:       never more approved players than game_state.total_players
+# A player is auto-admitted if they're on the allowlist OR match the pattern,
+# in join order, while seats are left.
+
+
+def load_allowlist(source):
+    """Nicknames from a URL or local file (same sources as the question import)."""
+    names = set()
+    for _, line in iter_lines(source):
+        name = line.split("#", 1)[0].strip()
+        if name:
+            names.add(name.casefold())
+    return names
+
+
+class AdmitPolicy:
+    """Auto-admit rules for one room; changed from the admin UI, read by the Admission Gate."""
+
+    def __init__(self):
+        self.enabled = False
+        self.allowlist = set()
+        self.pattern = ""
+        self.use_cap = True
+        self._regex = None
+        self._lock = threading.Lock()
+
+    def configure(self, enabled, pattern="", use_cap=True, allowlist=None):
+        """Raises re.error for an invalid pattern (nothing is changed then)."""
+        regex = re.compile(pattern.strip(), re.IGNORECASE) if pattern.strip() else None
+        with self._lock:
+            self.enabled = enabled
+            self.pattern = pattern.strip()
+            self._regex = regex
+            self.use_cap = use_cap
+            if allowlist is not None:
+                self.allowlist = set(allowlist)
+
+    def matches(self, user_id):
+        return user_id.casefold() in self.allowlist or bool(self._regex and self._regex.fullmatch(user_id))
+
+    def select(self, pending, approved, cap):
+        """
+        user_ids to admit now from `pending` rows (oldest first), given
+        `approved` players already in and the room's total_players `cap`.
+        """
+        if not self.enabled:
+            return []
+        picked = [p['user_id'] for p in sorted(pending, key=lambda p: p.get('created_at') or "")
+                  if self.matches(p['user_id'])]
+        if self.use_cap and cap:
+            picked = picked[:max(0, cap - approved)]
+        return picked
+
+    def describe(self):
+        if not self.enabled:
+            return "Auto-admit off"
+        rules = []
+        if self.allowlist:
+            rules.append(f"{len(self.allowlist)} allowlisted name(s)")
+        if self.pattern:
+            rules.append(f"names matching `{self.pattern}`")
+        return "Auto-admit: " + (" or ".join(rules) or "no rules yet") + (" · capped at Max Players" if self.use_cap else "")
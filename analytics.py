@@ -0,0 +1,178 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ballot import normalize_option
+from history import ARCHIVE_DIR, load_archive
+
+# ==========================================
+# 📈 SEASON ANALYTICS (many games, columnar)
+# ==========================================
+# Every archived game (history.archive_game) is turned into one DataFrame
+# per table, tagged with a `game` column, and the season is their concat.
+# The metrics are joins + group-bys over whole columns, never a Python loop
+# per vote:
+#   - bluff_success:     per author, how often a bluff of theirs fooled a voter
+#   - question_accuracy: per question text, how often voters found the answer
+#   - fooled_pairs:      (bluffer, victim) pairs, most frequent first
+#
+# Parsing an archive's gzip'd JSON is the slow part, so each archive's frames
+# are cached next to it (archives/.cache/<archive>.<table>.parquet, or
+# .feather) and reused while the archive file is older than the cache.
+
+CACHE_DIR = os.path.join(ARCHIVE_DIR, ".cache")
+CACHE_FORMAT = "parquet"   # or "feather"
+
+COLUMNS = {
+    "questions": ["id", "question_text", "correct_answer"],
+    "player_inputs": ["question_id", "user_id", "answer_text"],
+    "ballot_options": ["id", "question_id", "option_text", "is_correct"],
+    "option_authors": ["option_id", "question_id", "author"],   # ballot_options.authors, one row per author
+    "player_votes": ["question_id", "user_id", "option_id", "voted_for"],
+}
+
+PLAYER_COLUMNS = [("player_inputs", "user_id"), ("option_authors", "author"), ("player_votes", "user_id")]
+
+
+def table_frames(tables, game):
+    """One game's rows (table name -> list of dicts) as DataFrames with a `game` column."""
+    opts = tables.get("ballot_options") or []
+    tables = dict(tables, option_authors=[
+        # jsonb arrives decoded; older dumps may hold the JSON text
+        {"option_id": o['id'], "question_id": o['question_id'], "author": author}
+        for o in opts if not o['is_correct']
+        for author in (json.loads(o['authors']) if isinstance(o['authors'], str) else o['authors'] or [])
+    ])
+    frames = {}
+    for name, columns in COLUMNS.items():
+        df = pd.DataFrame(tables.get(name) or [], columns=columns)
+        df.insert(0, "game", game)
+        frames[name] = df
+    frames["player_votes"]["option_id"] = pd.to_numeric(frames["player_votes"]["option_id"]).astype("Int64")
+    frames["ballot_options"]["is_correct"] = frames["ballot_options"]["is_correct"].astype(bool)
+    return frames
+
+
+def _cache_path(path, name, cache_dir, fmt):
+    stem = os.path.basename(path).removesuffix(".json.gz")
+    return os.path.join(cache_dir, f"{stem}.{name}.{fmt}")
+
+
+def archive_frames(path, cache_dir=CACHE_DIR, fmt=CACHE_FORMAT):
+    """Frames of one archive, from the columnar cache when it's fresh."""
+    paths = {name: _cache_path(path, name, cache_dir, fmt) for name in COLUMNS} if cache_dir else {}
+    archived = os.path.getmtime(path)
+    if paths and all(os.path.exists(p) and os.path.getmtime(p) >= archived for p in paths.values()):
+        read = pd.read_parquet if fmt == "parquet" else pd.read_feather
+        return {name: read(p) for name, p in paths.items()}
+
+    frames = table_frames(load_archive(path)["tables"], os.path.basename(path).removesuffix(".json.gz"))
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, df in frames.items():
+            getattr(df, f"to_{fmt}")(paths[name])
+    return frames
+
+
+def season_frames(frame_sets):
+    """Concats per-game frames into season frames; `game` is one categorical shared by all of them."""
+    season = {}
+    for name in COLUMNS:
+        parts = [f[name] for f in frame_sets]
+        season[name] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["game"] + COLUMNS[name])
+    # Shared categories: joins and group-bys on game / player names run on integer codes
+    games = pd.Index(sorted({g for df in season.values() for g in df["game"].unique()}))
+    names = pd.Index(sorted(set().union(*(season[t][c].unique() for t, c in PLAYER_COLUMNS))))
+    for df in season.values():
+        df["game"] = pd.Categorical(df["game"], categories=games)
+    for table, column in PLAYER_COLUMNS:
+        season[table][column] = pd.Categorical(season[table][column], categories=names)
+    return season
+
+
+def _key(df, column):
+    # (game, id) packed into one int64, so lookups are single-column hash joins
+    ids = df[column].fillna(-1).astype("int64").to_numpy()
+    return (df["game"].cat.codes.to_numpy().astype("int64") << 40) | (ids & ((1 << 40) - 1))
+
+
+def _vote_options(season):
+    """Packed option key per vote; votes without an option id are matched by text within their ballot."""
+    votes, opts = season["player_votes"], season["ballot_options"]
+    keys = _key(votes, "option_id")
+    missing = votes["option_id"].isna().to_numpy()
+    if missing.any():
+        text_key = pd.Index(list(zip(opts["game"].cat.codes, opts["question_id"], opts["option_text"].map(normalize_option))))
+        legacy = votes[missing]
+        pos = text_key.get_indexer(list(zip(legacy["game"].cat.codes, legacy["question_id"], legacy["voted_for"].map(normalize_option))))
+        keys[missing] = np.where(pos >= 0, _key(opts, "id")[np.maximum(pos, 0)], -1)
+    return keys
+
+
+def _vote_correct(season):
+    """Boolean per vote: picked the real answer."""
+    opts = season["ballot_options"]
+    pos = pd.Index(_key(opts, "id")).get_indexer(_vote_options(season))
+    return np.where(pos >= 0, opts["is_correct"].to_numpy(dtype=bool)[np.maximum(pos, 0)], False)
+
+
+def _fooled(season):
+    votes = season["player_votes"]
+    authors = season["option_authors"]
+    hits = pd.DataFrame({"key": _vote_options(season), "user_id": votes["user_id"]}).merge(
+        pd.DataFrame({"key": _key(authors, "option_id"), "author": authors["author"]}), on="key")
+    return hits[hits["user_id"].cat.codes != hits["author"].cat.codes]
+
+
+def bluff_success(season, fooled=None):
+    """Per author: bluffs on ballots, votes that saw them, votes fooled, success rate."""
+    authored = season["option_authors"][["game", "question_id", "author"]].drop_duplicates()
+    votes = season["player_votes"]
+    if authored.empty:
+        return pd.DataFrame(columns=["author", "bluffs", "seen", "fooled", "success_rate"])
+
+    per_round = votes.groupby(["game", "question_id"], observed=True).size().rename("votes").reset_index()
+    own = votes[["game", "question_id", "user_id"]].drop_duplicates().rename(columns={"user_id": "author"}).assign(own=1)
+    rounds = authored.merge(per_round, on=["game", "question_id"], how="left").merge(
+        own, on=["game", "question_id", "author"], how="left")
+    rounds["seen"] = rounds["votes"].fillna(0) - rounds["own"].fillna(0)
+
+    out = rounds.groupby("author", observed=True).agg(bluffs=("question_id", "size"), seen=("seen", "sum"))
+    fooled = _fooled(season) if fooled is None else fooled
+    out["fooled"] = fooled.groupby("author", observed=True).size().reindex(out.index, fill_value=0)
+    out["success_rate"] = np.where(out["seen"] > 0, out["fooled"] / out["seen"].where(out["seen"] > 0, 1), 0.0)
+    out = out.reset_index().astype({"author": str})
+    return out.sort_values(["success_rate", "fooled"], ascending=False, ignore_index=True)
+
+
+def question_accuracy(season):
+    """Per question text: games it was played in, votes, correct votes, accuracy."""
+    votes = season["player_votes"][["game", "question_id"]].assign(is_correct=_vote_correct(season))
+    qs = season["questions"].rename(columns={"id": "question_id"})[["game", "question_id", "question_text"]]
+    votes = votes.merge(qs, on=["game", "question_id"])
+    if votes.empty:
+        return pd.DataFrame(columns=["question_text", "games", "votes", "correct", "accuracy"])
+    out = votes.groupby("question_text").agg(
+        games=("game", "nunique"), votes=("is_correct", "size"), correct=("is_correct", "sum"))
+    out["accuracy"] = out["correct"] / out["votes"]
+    return out.reset_index().sort_values(["accuracy", "votes"], ascending=[True, False], ignore_index=True)
+
+
+def fooled_pairs(season, top=20, fooled=None):
+    """(bluffer, victim, times) for the most frequent pairs."""
+    fooled = _fooled(season) if fooled is None else fooled
+    pairs = fooled.groupby(["author", "user_id"], observed=True).size().rename("times").reset_index()
+    pairs = pairs.rename(columns={"author": "bluffer", "user_id": "victim"}).astype({"bluffer": str, "victim": str})
+    return pairs.nlargest(top, "times").reset_index(drop=True)
+
+
+def season_stats(season, top=20):
+    """All three tables; the vote -> bluff author join is done once for both that need it."""
+    fooled = _fooled(season)
+    return {
+        "bluffs": bluff_success(season, fooled),
+        "questions": question_accuracy(season),
+        "pairs": fooled_pairs(season, top, fooled),
+    }
@@ -0,0 +1,153 @@
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+
+import requests
+import streamlit as st
+from PIL import Image, ImageSequence, UnidentifiedImageError
+
+# ==========================================
+# 🖼️ WAITING-SCREEN IMAGES (loaded once per server process)
+# ==========================================
+# The PENDING / LOBBY screens show an image from Images/. Files are read and
+# slimmed down once at startup (scaled to MAX_WIDTH, in a format st.image
+# passes through untouched) and handed to st.image as bytes. Streamlit serves
+# bytes under a content-hash URL, so the same image keeps the same URL across
+# reruns and sessions and the browser downloads it once.
+#
+# st.image only keeps bytes as they are if they're a GIF, a PNG with an alpha
+# channel, or a JPEG; anything else (WebP, an opaque PNG) is re-encoded on
+# every rerun, and animated non-GIFs lose all but their first frame. So
+# animated images stay (or become) animated GIFs.
+# Each session sticks to one pick (pick_waiting_image), so a rerun never
+# swaps in a different image.
+#
+# Remote URLs (WAITING_IMAGE_URLS in player.py) are only a fallback for an
+# empty Images/: they're downloaded once, server-side, into Images/.cache/,
+# by a background thread so no page load waits on them (or on a network that
+# isn't there). Phones never hotlink them.
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Images")
+CACHE_DIR = os.path.join(IMAGE_DIR, ".cache")
+IMAGE_EXTENSIONS = (".gif", ".png", ".jpg", ".jpeg", ".webp")
+MAX_WIDTH = 480
+FETCH_TIMEOUT = 10
+FETCH_RETRY = 300   # seconds before another download attempt after one got nothing
+
+
+def _image_files(folder):
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def prefetch(urls, folder=CACHE_DIR):
+    """Downloads `urls` into `folder` (skipping ones already there); returns the local paths."""
+    paths = []
+    for url in urls:
+        ext = os.path.splitext(url.split("?")[0])[1].lower()
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + (ext if ext in IMAGE_EXTENSIONS else ".gif")
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            try:
+                res = requests.get(url, timeout=FETCH_TIMEOUT)
+                res.raise_for_status()
+            except requests.RequestException:
+                continue
+            os.makedirs(folder, exist_ok=True)
+            with open(path + ".part", "wb") as f:
+                f.write(res.content)
+            os.replace(path + ".part", path)
+        paths.append(path)
+    return paths
+
+
+def _has_alpha(img):
+    return img.mode in ("RGBA", "LA", "P") or "transparency" in img.info
+
+
+def _kept_by_streamlit(img):
+    # Mirrors st.image's format pick for bytes: GIF, else PNG when there may be alpha, else JPEG
+    kept = "GIF" if img.format == "GIF" else "PNG" if img.mode in ("RGBA", "LA", "P") else "JPEG"
+    return img.format == kept
+
+
+def slim(data, max_width=MAX_WIDTH):
+    """
+    Smaller bytes for the same picture, scaled down to max_width, in a format
+    st.image serves as-is: animated images as animated GIF, still ones as PNG
+    (with alpha) or JPEG. Returns the original bytes if they already qualify
+    and aren't bigger.
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(img):
+            frames.append(frame.convert("RGBA"))
+            durations.append(frame.info.get("duration", img.info.get("duration", 100)))
+    except (UnidentifiedImageError, OSError):
+        return data
+    if img.width > max_width:
+        size = (max_width, max(1, round(img.height * max_width / img.width)))
+        frames = [f.resize(size, Image.LANCZOS) for f in frames]
+
+    out = io.BytesIO()
+    if len(frames) > 1 or img.format == "GIF":
+        frames[0].save(out, "GIF", save_all=True, append_images=frames[1:], duration=durations,
+                       loop=img.info.get("loop", 0), disposal=2, optimize=True)
+    elif _has_alpha(img):
+        frames[0].save(out, "PNG", optimize=True)
+    else:
+        frames[0].convert("RGB").save(out, "JPEG", quality=80, optimize=True, progressive=True)
+    if img.width <= max_width and _kept_by_streamlit(img) and len(data) <= out.tell():
+        return data
+    return out.getvalue()
+
+
+_images = None           # slimmed bytes, once there are any
+_fetcher = None          # background prefetch of the fallback URLs
+_fetch_started = 0.0
+_images_lock = threading.Lock()
+
+
+def load_waiting_images(urls=()):
+    """
+    Bytes of every waiting image, slimmed, loaded once per process. Images/
+    first, then Images/.cache/. If both are empty, `urls` are prefetched into
+    Images/.cache/ in the background and this returns [] until they're in;
+    nothing empty is kept, so a failed download is retried after FETCH_RETRY.
+    """
+    global _images, _fetcher, _fetch_started
+    with _images_lock:
+        if _images:
+            return _images
+        if _fetcher is not None and _fetcher.is_alive():
+            return []
+        paths = _image_files(IMAGE_DIR) or _image_files(CACHE_DIR)
+        if paths:
+            images = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    images.append(slim(f.read()))
+            _images = images
+            return _images
+        if urls and (_fetcher is None or time.monotonic() - _fetch_started >= FETCH_RETRY):
+            _fetcher = threading.Thread(target=prefetch, args=(list(urls),), daemon=True, name="quiz-image-prefetch")
+            _fetch_started = time.monotonic()
+            _fetcher.start()
+        return []
+
+
+def pick_waiting_image(images):
+    """This session's image: chosen once, the same on every rerun."""
+    if not images:
+        return None
+    if "waiting_image" not in st.session_state:
+        st.session_state.waiting_image = random.randrange(len(images))
+    return images[st.session_state.waiting_image % len(images)]
@@ -0,0 +1,530 @@
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+import httpx
+import streamlit as st
+from postgrest.exceptions import APIError
+
+from coalesce import CoalescingConnection
+
+# ==========================================
+# 🔌 STORAGE BACKENDS
+# ==========================================
+# Both apps only ever talk to `conn.table(name)...execute()` (plus
+# `conn.client.rpc(...)`), so any object offering that query-builder API
+# can stand in for Supabase:
+#   - "supabase" (default): st.connection("supabase", type=SupabaseConnection)
+#   - "sqlite": LocalBackend, an indexed SQLite file (or ":memory:") with the
+#     same tables, for offline LAN games, profiling and load tests.
+#
+# Pick it with QUIZ_BACKEND=sqlite (+ QUIZ_DB=quiz.db, optional
+# QUIZ_DB_LATENCY=0.02 to simulate a network round trip), or in secrets:
+#   [backend]
+#   type = "sqlite"
+#   path = "quiz.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS game_state (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    phase TEXT NOT NULL DEFAULT 'LOBBY',
+    current_question_id INTEGER,
+    total_players INTEGER DEFAULT 2,
+    playlist TEXT NOT NULL DEFAULT '[]',
+    playlist_pos INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS game_state_room ON game_state (room_id);
+INSERT OR IGNORE INTO game_state (id, room_id) VALUES (1, 'MAIN');
+
+CREATE TABLE IF NOT EXISTS players (
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    PRIMARY KEY (room_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS players_room_status ON players (room_id, status);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    question_text TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS questions_room ON questions (room_id, id);
+
+CREATE TABLE IF NOT EXISTS player_inputs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    answer_text TEXT,
+    submit_token TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS player_inputs_once ON player_inputs (question_id, user_id);
+CREATE INDEX IF NOT EXISTS player_inputs_room ON player_inputs (room_id, id);
+
+CREATE TABLE IF NOT EXISTS player_votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    voted_for TEXT,
+    option_id INTEGER,
+    submit_token TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS player_votes_once ON player_votes (question_id, user_id);
+CREATE INDEX IF NOT EXISTS player_votes_room ON player_votes (room_id, id);
+
+CREATE TABLE IF NOT EXISTS ballot_options (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    question_id INTEGER NOT NULL,
+    option_no INTEGER NOT NULL,
+    option_text TEXT NOT NULL,
+    is_correct INTEGER NOT NULL DEFAULT 0,
+    authors TEXT NOT NULL DEFAULT '[]'
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ballot_options_question ON ballot_options (question_id, option_no);
+CREATE INDEX IF NOT EXISTS ballot_options_room ON ballot_options (room_id);
+
+CREATE TABLE IF NOT EXISTS game_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id TEXT NOT NULL DEFAULT 'MAIN',
+    round_id INTEGER,
+    log_type TEXT,
+    details TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS game_logs_room ON game_logs (room_id, created_at);
+"""
+
+TABLES = {"game_state", "players", "questions", "player_inputs", "player_votes", "ballot_options", "game_logs"}
+PRIMARY_KEYS = {"players": "room_id,user_id"}   # everything else: "id"
+JSON_COLUMNS = {"authors", "playlist"}   # jsonb in Postgres, stored as JSON text here
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _ident(name):
+    name = name.strip()
+    if not _IDENT.match(name):
+        raise APIError({"message": f"invalid identifier: {name!r}", "code": "42601"})
+    return name
+
+
+class Response:
+    """Mirrors postgrest's APIResponse: `.data` rows and optional `.count`."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+    """Chainable builder with the subset of the postgrest API the apps use."""
+
+    def __init__(self, backend, table):
+        if table not in TABLES:
+            raise APIError({"message": f"relation {table!r} does not exist", "code": "42P01"})
+        self.backend = backend
+        self.table = table
+        self.action = "select"
+        self.columns = ["*"]
+        self.payload = None
+        self.filters = []
+        self.order_by = []
+        self.limit_n = None
+        self.offset_n = None
+        self.count_method = None
+        self.head = False
+        self.on_conflict = None
+        self.ignore_duplicates = False
+
+    # --- actions ---
+    def select(self, *columns, count=None, head=None):
+        cols = [c for part in (columns or ("*",)) for c in part.split(",") if c.strip()]
+        self.columns = ["*"] if cols == ["*"] else [_ident(c) for c in cols]
+        self.count_method = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, json, count=None, returning=None, upsert=False, default_to_null=True):
+        self.action = "insert"
+        self.payload = json if isinstance(json, list) else [json]
+        return self
+
+    def upsert(self, json, count=None, returning=None, ignore_duplicates=False, on_conflict="", default_to_null=True):
+        self.insert(json)
+        self.action = "upsert"
+        self.on_conflict = on_conflict or PRIMARY_KEYS.get(self.table, "id")
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json, count=None, returning=None):
+        self.action = "update"
+        self.payload = json
+        return self
+
+    def delete(self, count=None, returning=None):
+        self.action = "delete"
+        return self
+
+    # --- filters ---
+    def _filter(self, column, op, value):
+        self.filters.append((_ident(column), op, value))
+        return self
+
+    def eq(self, column, value): return self._filter(column, "=", value)
+    def neq(self, column, value): return self._filter(column, "!=", value)
+    def gt(self, column, value): return self._filter(column, ">", value)
+    def gte(self, column, value): return self._filter(column, ">=", value)
+    def lt(self, column, value): return self._filter(column, "<", value)
+    def lte(self, column, value): return self._filter(column, "<=", value)
+    def in_(self, column, values): return self._filter(column, "IN", list(values))
+
+    def ilike(self, column, pattern):
+        # PostgREST accepts "*" as well as "%" for the wildcard
+        return self._filter(column, "LIKE", pattern.replace("*", "%"))
+
+    # --- modifiers ---
+    def order(self, column, desc=False, nullsfirst=None, foreign_table=None):
+        self.order_by.append((_ident(column), desc))
+        return self
+
+    def limit(self, size, foreign_table=None):
+        self.limit_n = int(size)
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        # Inclusive on both ends, like postgrest's .range()
+        self.offset_n = int(start)
+        self.limit_n = int(end) - int(start) + 1
+        return self
+
+    def execute(self):
+        return self.backend.execute(self)
+
+
+class LocalRPC:
+    def __init__(self, backend, fn, params):
+        self.backend = backend
+        self.fn = fn
+        self.params = params or {}
+
+    def execute(self):
+        return self.backend.call(self.fn, self.params)
+
+
+class LocalBackend:
+    """
+    SQLite implementation of the game tables. One connection guarded by a lock,
+    so it is safe to share between every Streamlit session in the process.
+
+    latency / fault_rate simulate a remote database: each execute() sleeps
+    `latency` seconds and raises a transient httpx.ConnectError with
+    probability `fault_rate` (for exercising run_safe under faults).
+    """
+
+    def __init__(self, path=":memory:", latency=0.0, fault_rate=0.0, seed=None):
+        self.path = path
+        self.latency = latency
+        self.fault_rate = fault_rate
+        self.rng = random.Random(seed)
+        self.queries = 0
+        self.bytes_out = 0   # JSON size of everything returned, i.e. what PostgREST would send
+        self.client = self   # so `conn.client.rpc(...)` works like on SupabaseConnection
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def table(self, name):
+        return LocalQuery(self, name)
+
+    def rpc(self, fn, params=None):
+        return LocalRPC(self, fn, params)
+
+    # --- execution ---
+    def _simulate_network(self):
+        with self._lock:
+            self.queries += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fault_rate and self.rng.random() < self.fault_rate:
+            raise httpx.ConnectError("injected fault")
+
+    def _account(self, response):
+        size = len(json.dumps(response.data, default=str)) if response.data else 0
+        with self._lock:
+            self.bytes_out += size
+        return response
+
+    @staticmethod
+    def _where(filters):
+        if not filters:
+            return "", []
+        parts, params = [], []
+        for col, op, val in filters:
+            if op == "IN":
+                if not val:
+                    parts.append("0")
+                    continue
+                parts.append(f"{col} IN ({', '.join('?' * len(val))})")
+                params.extend(val)
+            elif op == "LIKE":
+                # SQLite's LIKE is case-insensitive (ASCII), i.e. ilike
+                parts.append(f"{col} LIKE ? ESCAPE '\\'")
+                params.append(val)
+            else:
+                parts.append(f"{col} {op} ?")
+                params.append(val)
+        return " WHERE " + " AND ".join(parts), params
+
+    @staticmethod
+    def _value(v):
+        return json.dumps(v) if isinstance(v, (dict, list)) else v
+
+    def execute(self, q):
+        self._simulate_network()
+        try:
+            with self._lock:
+                response = getattr(self, f"_run_{q.action}")(q)
+            return self._account(response)
+        except sqlite3.IntegrityError as e:
+            raise APIError({"message": str(e), "code": "23505" if "UNIQUE" in str(e) else "23502"})
+        except sqlite3.OperationalError as e:
+            code = "40001" if "locked" in str(e) else "42703"
+            raise APIError({"message": str(e), "code": code})
+
+    def _rows(self, sql, params):
+        rows = [dict(r) for r in self._db.execute(sql, params).fetchall()]
+        for row in rows:
+            for col in JSON_COLUMNS.intersection(row):
+                if isinstance(row[col], str):
+                    row[col] = json.loads(row[col])
+        return rows
+
+    def _run_select(self, q):
+        where, params = self._where(q.filters)
+        count = None
+        if q.count_method:
+            count = self._db.execute(f"SELECT COUNT(*) FROM {q.table}{where}", params).fetchone()[0]
+        if q.head:
+            return Response([], count)
+        sql = f"SELECT {', '.join(q.columns)} FROM {q.table}{where}"
+        if q.order_by:
+            sql += " ORDER BY " + ", ".join(f"{c} {'DESC' if d else 'ASC'}" for c, d in q.order_by)
+        if q.limit_n is not None or q.offset_n is not None:
+            sql += f" LIMIT {q.limit_n if q.limit_n is not None else -1} OFFSET {q.offset_n or 0}"
+        return Response(self._rows(sql, params), count)
+
+    def _run_insert(self, q):
+        out = []
+        self._db.execute("BEGIN")
+        try:
+            for row in q.payload:
+                cols = [_ident(c) for c in row]
+                sql = f"INSERT INTO {q.table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+                if q.action == "upsert":
+                    target = [_ident(c) for c in q.on_conflict.split(",")]
+                    rest = [c for c in cols if c not in target]
+                    if q.ignore_duplicates or not rest:
+                        sql += f" ON CONFLICT ({', '.join(target)}) DO NOTHING"
+                    else:
+                        sql += f" ON CONFLICT ({', '.join(target)}) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in rest)
+                out.extend(self._rows(sql + " RETURNING *", [self._value(v) for v in row.values()]))
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return Response(out)
+
+    _run_upsert = _run_insert
+
+    def _run_update(self, q):
+        where, params = self._where(q.filters)
+        cols = [_ident(c) for c in q.payload]
+        sets = ", ".join(f"{c} = ?" for c in cols)
+        values = [self._value(v) for v in q.payload.values()]
+        return Response(self._rows(f"UPDATE {q.table} SET {sets}{where} RETURNING *", values + params))
+
+    def _run_delete(self, q):
+        where, params = self._where(q.filters)
+        return Response(self._rows(f"DELETE FROM {q.table}{where} RETURNING *", params))
+
+    # --- server-side functions (same names as the SQL in sql/) ---
+    def call(self, fn, params):
+        self._simulate_network()
+        handler = getattr(self, f"_rpc_{fn}", None)
+        if handler is None:
+            raise APIError({"message": f"function {fn} does not exist", "code": "PGRST202"})
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                result = handler(**params)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return self._account(Response(result))
+
+    def _rpc_finalize_bluffs(self, p_room_id, p_question_id, p_edits, p_details, p_ballot):
+        in_input = self._db.execute(
+            "SELECT 1 FROM game_state WHERE room_id = ? AND phase = 'INPUT' AND current_question_id = ?",
+            (p_room_id, p_question_id),
+        ).fetchone()
+        if not in_input:
+            return None
+        self._db.executemany(
+            "UPDATE player_inputs SET answer_text = ? WHERE id = ? AND room_id = ?",
+            [(text, int(i), p_room_id) for i, text in p_edits.items()],
+        )
+        self._db.execute("DELETE FROM ballot_options WHERE question_id = ?", (p_question_id,))
+        self._db.executemany(
+            "INSERT INTO ballot_options (room_id, question_id, option_no, option_text, is_correct, authors) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(p_room_id, p_question_id, o["option_no"], o["option_text"], bool(o["is_correct"]),
+              json.dumps(o.get("authors", []))) for o in p_ballot],
+        )
+        self._db.execute(
+            "INSERT INTO game_logs (room_id, round_id, log_type, details) VALUES (?, ?, 'BLUFFS_FINALIZED', ?)",
+            (p_room_id, p_question_id, p_details),
+        )
+        self._db.execute("UPDATE game_state SET phase = 'VOTING' WHERE room_id = ?", (p_room_id,))
+        return None
+
+    def _rpc_reset_room(self, p_room_id):
+        self._db.execute(
+            "UPDATE game_state SET current_question_id = NULL, phase = 'LOBBY', total_players = 2, "
+            "playlist = '[]', playlist_pos = 0 WHERE room_id = ?", (p_room_id,),
+        )
+        for table in ("player_votes", "ballot_options", "player_inputs", "game_logs", "players", "questions"):
+            self._db.execute(f"DELETE FROM {table} WHERE room_id = ?", (p_room_id,))
+        return None
+
+    def _submit_once(self, table, phase, p_room_id, p_question_id, p_user_id, values):
+        # Shared body of submit_input / cast_vote (sql/submissions.sql)
+        is_open = self._db.execute(
+            "SELECT 1 FROM game_state WHERE room_id = ? AND phase = ? AND current_question_id = ?",
+            (p_room_id, phase, p_question_id),
+        ).fetchone()
+        if is_open:
+            row = {"room_id": p_room_id, "user_id": p_user_id, "question_id": p_question_id, **values}
+            self._db.execute(
+                f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))}) "
+                "ON CONFLICT (question_id, user_id) DO NOTHING", list(row.values()),
+            )
+        rows = self._rows(f"SELECT * FROM {table} WHERE question_id = ? AND user_id = ?", (p_question_id, p_user_id))
+        return rows[0] if rows else None
+
+    def _rpc_submit_input(self, p_room_id, p_question_id, p_user_id, p_answer_text, p_token):
+        return self._submit_once("player_inputs", "INPUT", p_room_id, p_question_id, p_user_id,
+                                 {"answer_text": p_answer_text, "submit_token": p_token})
+
+    def _rpc_cast_vote(self, p_room_id, p_question_id, p_user_id, p_option_id, p_voted_for, p_token):
+        return self._submit_once("player_votes", "VOTING", p_room_id, p_question_id, p_user_id,
+                                 {"option_id": p_option_id, "voted_for": p_voted_for, "submit_token": p_token})
+
+    def _rpc_player_view(self, p_room_id, p_user_id):
+        row = self._db.execute(
+            "SELECT gs.phase, gs.current_question_id, gs.playlist, gs.playlist_pos, q.question_text, q.correct_answer "
+            "FROM game_state gs LEFT JOIN questions q ON q.id = gs.current_question_id "
+            "WHERE gs.room_id = ?", (p_room_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        phase, q_id = row["phase"], row["current_question_id"]
+        status = self._db.execute(
+            "SELECT status FROM players WHERE room_id = ? AND user_id = ?", (p_room_id, p_user_id)
+        ).fetchone()
+        mine = "SELECT EXISTS (SELECT 1 FROM {} WHERE question_id = ? AND user_id = ?)"
+        view = {
+            "status": status[0] if status else None,
+            "phase": phase,
+            "question_id": q_id,
+            "question_text": row["question_text"],
+            "round": row["playlist_pos"] + 1,
+            "rounds": len(json.loads(row["playlist"] or "[]")),
+            "submitted": bool(self._db.execute(mine.format("player_inputs"), (q_id, p_user_id)).fetchone()[0]),
+            "voted": bool(self._db.execute(mine.format("player_votes"), (q_id, p_user_id)).fetchone()[0]),
+            "options": None,
+            "correct_answer": None,
+            "reveal": None,
+        }
+        if phase == "VOTING":
+            view["options"] = self._rows(
+                "SELECT id, option_text AS text FROM ballot_options WHERE question_id = ? ORDER BY option_no", (q_id,)
+            )
+        elif phase == "RESULTS":
+            view["correct_answer"] = row["correct_answer"]
+            view["reveal"] = self._rows(
+                "SELECT answer_text, user_id FROM player_inputs WHERE question_id = ? ORDER BY id", (q_id,)
+            )
+        return view
+
+
+# ==========================================
+# 🧩 CONNECTION FACTORY (used by both apps)
+# ==========================================
+def backend_config():
+    kind = os.environ.get("QUIZ_BACKEND")
+    path = os.environ.get("QUIZ_DB")
+    if not kind:
+        try:
+            cfg = st.secrets["backend"]
+            kind, path = cfg.get("type"), path or cfg.get("path")
+        except Exception:
+            pass
+    return (kind or "supabase").lower(), path or "quiz.db"
+
+
+@st.cache_resource
+def _local_backend(path, latency):
+    return LocalBackend(path, latency=latency)
+
+
+# One keep-alive pool per process for every session's PostgREST calls:
+# sessions wake together on a phase flip, so keep enough warm connections
+# around that a burst doesn't pay TCP + TLS handshakes again.
+POOL_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120)
+POOL_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+
+
+@st.cache_resource
+def _supabase_connection():
+    from st_supabase_connection import SupabaseConnection
+    conn = st.connection("supabase", type=SupabaseConnection)
+    postgrest = conn.client.postgrest
+    default = postgrest.session
+    postgrest.session = httpx.Client(
+        base_url=default.base_url, headers=default.headers, timeout=POOL_TIMEOUT,
+        limits=POOL_LIMITS, http2=True, follow_redirects=True,
+    )
+    default.close()
+    return conn
+
+
+def get_connection():
+    """
+    The configured backend, wrapped so identical concurrent reads are
+    coalesced (coalesce.py). QUIZ_COALESCE=0 turns that off.
+    """
+    kind, path = backend_config()
+    if kind == "sqlite":
+        conn = _local_backend(path, float(os.environ.get("QUIZ_DB_LATENCY", 0)))
+    else:
+        conn = _supabase_connection()
+    if os.environ.get("QUIZ_COALESCE", "1") == "0":
+        return conn
+    return CoalescingConnection(conn)
@@ -0,0 +1,49 @@
+import hashlib
+import random
+
+# ==========================================
+# 🗳️ BALLOTS (built once per round, shared by every voter)
+# ==========================================
+# When the admin starts voting, the finalized bluffs plus the correct answer
+# become rows in ballot_options: deduplicated, each with a stable id. Players
+# only read those rows and vote by option id, so scoring is an id lookup
+# instead of matching free text.
+
+
+def normalize_option(text):
+    """Dedupe key: case and extra whitespace don't make a different answer."""
+    return " ".join((text or "").split()).casefold()
+
+
+def build_ballot(correct_answer, inputs):
+    """
+    Returns the ballot rows for one question, numbered 1..n (option_no).
+
+    inputs: finalized player_inputs rows (answer_text, user_id). Bluffs that
+    normalize to the same text are merged and keep all their authors; a bluff
+    equal to the correct answer fools nobody, so that option has no authors.
+    """
+    options = {}
+    key = normalize_option(correct_answer)
+    options[key] = {"option_text": " ".join(correct_answer.split()), "is_correct": True, "authors": []}
+    for row in inputs:
+        text = " ".join((row['answer_text'] or "").split())
+        if not text:
+            continue
+        option = options.setdefault(normalize_option(text), {"option_text": text, "is_correct": False, "authors": []})
+        if not option["is_correct"] and row['user_id'] not in option["authors"]:
+            option["authors"].append(row['user_id'])
+
+    # Numbered alphabetically, so option_no says nothing about which one is correct
+    rows = sorted(options.values(), key=lambda o: normalize_option(o["option_text"]))
+    for no, row in enumerate(rows, 1):
+        row["option_no"] = no
+    return rows
+
+
+def ballot_order(options, user_id, round_id):
+    """Same shuffle for the same player and round, in every session and process."""
+    seed = hashlib.sha1(f"{user_id}:{round_id}".encode("utf-8")).digest()
+    ordered = sorted(options, key=lambda o: o['id'])
+    random.Random(seed).shuffle(ordered)
+    return ordered
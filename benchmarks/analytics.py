@@ -0,0 +1,142 @@
+"""
+📈 Season analytics benchmark: metric time vs. number of votes.
+
+Builds a synthetic season straight into columnar frames (G games x R rounds
+x P players, one vote per player and round, a bluff from most players) and
+times analytics.bluff_success / question_accuracy / fooled_pairs on it.
+Also times loading one archive from its gzip'd JSON vs. the columnar cache.
+
+    python benchmarks/analytics.py --games 50 --rounds 20 --players 300
+    python benchmarks/analytics.py --games 100 --rounds 20 --players 500 --format feather
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import analytics  # noqa: E402
+from history import archive_game  # noqa: E402
+from backend import LocalBackend  # noqa: E402
+
+
+def synthetic_season(games, rounds, players, seed):
+    rng = np.random.default_rng(seed)
+    n_q = games * rounds
+    game = np.repeat([f"g{g:03d}" for g in range(games)], rounds)
+    qid = np.tile(np.arange(1, rounds + 1), games)
+    questions = pd.DataFrame({
+        "game": game, "id": qid,
+        "question_text": [f"Question {i % (rounds * 3)}" for i in range(n_q)],   # questions repeat across weeks
+        "correct_answer": "answer",
+    })
+    # Ballot: the correct answer + one bluff per player
+    per_q = players + 1
+    opt_q = np.repeat(np.arange(n_q), per_q)
+    option_id = np.arange(1, n_q * per_q + 1)
+    is_correct = np.tile(np.r_[True, np.zeros(players, bool)], n_q)
+    author_idx = np.tile(np.r_[-1, np.arange(players)], n_q)
+    opts = pd.DataFrame({
+        "game": game[opt_q], "id": option_id, "question_id": qid[opt_q],
+        "option_text": [f"opt {i}" for i in option_id], "is_correct": is_correct,
+    })
+    option_authors = pd.DataFrame({
+        "game": game[opt_q][~is_correct], "option_id": option_id[~is_correct], "question_id": qid[opt_q][~is_correct],
+        "author": [f"p{a}" for a in author_idx[~is_correct]],
+    })
+    inputs = pd.DataFrame({
+        "game": game[opt_q][~is_correct], "question_id": qid[opt_q][~is_correct],
+        "user_id": [f"p{a}" for a in author_idx[~is_correct]], "answer_text": "bluff",
+    })
+    # Votes: 40% find the answer, the rest pick a random bluff
+    vote_q = np.repeat(np.arange(n_q), players)
+    pick = np.where(rng.random(n_q * players) < 0.4, 0, rng.integers(1, per_q, n_q * players))
+    votes = pd.DataFrame({
+        "game": game[vote_q], "question_id": qid[vote_q],
+        "user_id": [f"p{u}" for u in np.tile(np.arange(players), n_q)],
+        "option_id": pd.array(vote_q * per_q + pick + 1, dtype="Int64"), "voted_for": None,
+    })
+    return analytics.season_frames([{
+        "questions": questions, "player_inputs": inputs, "ballot_options": opts,
+        "option_authors": option_authors, "player_votes": votes,
+    }])
+
+
+def time_it(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return round(best * 1000, 1)
+
+
+def archive_load(players, rounds, fmt):
+    # One real archive file through history.archive_game, then cold vs cached load
+    backend = LocalBackend()
+    qs = backend.table("questions").insert([{"question_text": f"Q{i}", "correct_answer": "a"} for i in range(rounds)]).execute().data
+    for q in qs:
+        opts = backend.table("ballot_options").insert([
+            {"question_id": q['id'], "option_no": n + 1, "option_text": f"o{n}", "is_correct": n == 0,
+             "authors": [] if n == 0 else [f"p{n}"]} for n in range(players)
+        ]).execute().data
+        backend.table("player_votes").insert([
+            {"question_id": q['id'], "user_id": f"p{n}", "option_id": opts[n % len(opts)]['id']} for n in range(players)
+        ]).execute()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = archive_game(backend, "MAIN", folder=tmp)
+        cache = os.path.join(tmp, ".cache")
+        cold = time_it(lambda: analytics.archive_frames(path, cache_dir=None, fmt=fmt))
+        analytics.archive_frames(path, cache_dir=cache, fmt=fmt)
+        warm = time_it(lambda: analytics.archive_frames(path, cache_dir=cache, fmt=fmt))
+    return {"votes": players * rounds, "json_ms": cold, "cached_ms": warm}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--format", choices=["parquet", "feather"], default=analytics.CACHE_FORMAT)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="JSON file (default: bench_results/analytics-<time>.json)")
+    args = parser.parse_args()
+
+    season = synthetic_season(args.games, args.rounds, args.players, args.seed)
+    n_votes = len(season["player_votes"])
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": vars(args),
+        "votes": n_votes,
+        "ms": {
+            "bluff_success": time_it(lambda: analytics.bluff_success(season)),
+            "question_accuracy": time_it(lambda: analytics.question_accuracy(season)),
+            "fooled_pairs": time_it(lambda: analytics.fooled_pairs(season)),
+            "season_stats (all three)": time_it(lambda: analytics.season_stats(season)),
+        },
+        "archive_load": archive_load(args.players, args.rounds, args.format),
+    }
+    print(f"{n_votes} votes over {args.games} games:", file=sys.stderr)
+    for name, ms in report["ms"].items():
+        print(f"  {name:<24} {ms:>8} ms", file=sys.stderr)
+    a = report["archive_load"]
+    print(f"  one archive ({a['votes']} votes): JSON {a['json_ms']} ms, {args.format} cache {a['cached_ms']} ms",
+          file=sys.stderr)
+
+    out = args.out or os.path.join(ROOT, "bench_results", f"analytics-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
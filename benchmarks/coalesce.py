@@ -0,0 +1,150 @@
+"""
+🔀 Coalescing benchmark: backend requests per phase flip vs. number of players.
+
+N player sessions (threads) wake up together after the admin flips to the
+next question and each does the reads a player rerun shares with everyone
+else: game_state, the question row and the round's ballot through the
+shared cache, plus one identical uncached read (the RESULTS reveal list).
+The backend is LocalBackend with a simulated round trip, so requests from
+different sessions overlap like they do against Supabase.
+
+Two setups per player count:
+  baseline   SharedCache without singleflight, plain connection
+  coalesced  SharedCache with singleflight + CoalescingConnection
+
+    python benchmarks/coalesce.py --players 10 50 100 200 --latency 0.03
+    python benchmarks/coalesce.py --jitter 0.05   # sessions wake spread over 50 ms
+
+Prints requests per flip (shared-cache reads / uncached read) and writes
+the full report to bench_results/coalesce-<time>.json.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend import LocalBackend  # noqa: E402
+from coalesce import CoalescingConnection  # noqa: E402
+from shared_cache import SharedCache  # noqa: E402
+
+ROOM = "MAIN"
+
+
+def seed_game(conn, rounds, players):
+    qs = conn.table("questions").insert([
+        {"room_id": ROOM, "question_text": f"Question {i}?", "correct_answer": f"answer {i}"} for i in range(rounds)
+    ]).execute().data
+    for q in qs:
+        conn.table("player_inputs").insert([
+            {"room_id": ROOM, "user_id": f"p{n}", "question_id": q['id'], "answer_text": f"bluff {n}"} for n in range(players)
+        ]).execute()
+        conn.table("ballot_options").insert([
+            {"room_id": ROOM, "question_id": q['id'], "option_no": n + 1, "option_text": f"bluff {n}"} for n in range(players)
+        ]).execute()
+    return [q['id'] for q in qs]
+
+
+def session_reads(cache, conn, loads):
+    """What one player rerun reads right after the flip (see player.py)."""
+    def load(fn):
+        # Runs only when the shared cache actually goes to the backend
+        def loader():
+            loads.append(1)
+            return fn()
+        return loader
+
+    state = cache.get(("game_state", ROOM), load(lambda: conn.table("game_state").select("*").eq("room_id", ROOM).execute().data[0]), ttl=1.0)
+    q_id = state['current_question_id']
+    cache.get(("questions", q_id), load(lambda: conn.table("questions").select("*").eq("id", q_id).execute().data[0]), ttl=30.0)
+    cache.get(("ballot", q_id), load(lambda: conn.table("ballot_options").select("id, option_text").eq("question_id", q_id).order("option_no").execute().data), ttl=30.0)
+    conn.table("player_inputs").select("answer_text, user_id").eq("question_id", q_id).order("id").execute()
+
+
+def run(n_players, flips, latency, jitter, coalesce, seed):
+    backend = LocalBackend(latency=0.0)
+    q_ids = seed_game(backend, flips, n_players)
+    backend.latency = latency
+    cache = SharedCache(coalesce=coalesce)
+    conn = CoalescingConnection(backend) if coalesce else backend
+    rng = random.Random(seed)
+
+    per_flip = []
+    for q_id in q_ids:
+        # The flip: admin moves to the next question, every session's cache entry is stale
+        backend.table("game_state").update({"phase": "INPUT", "current_question_id": q_id}).eq("room_id", ROOM).execute()
+        cache.invalidate(("game_state", ROOM))
+        delays = [rng.uniform(0, jitter) for _ in range(n_players)]
+        barrier = threading.Barrier(n_players + 1)
+        loads = []
+
+        def player(delay):
+            barrier.wait()
+            time.sleep(delay)
+            session_reads(cache, conn, loads)
+
+        threads = [threading.Thread(target=player, args=(d,)) for d in delays]
+        for t in threads:
+            t.start()
+        q0 = backend.queries
+        barrier.wait()
+        t0 = time.perf_counter()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+        total = backend.queries - q0
+        cached = len(loads)
+        per_flip.append({"requests": total, "cached_reads": cached, "uncached_reads": total - cached,
+                         "wall_ms": round(wall * 1000, 1)})
+
+    requests = [f["requests"] for f in per_flip]
+    return {
+        "requests_per_flip": round(statistics.fmean(requests), 1),
+        "requests_per_player": round(statistics.fmean(requests) / n_players, 3),
+        "cached_reads_per_flip": round(statistics.fmean(f["cached_reads"] for f in per_flip), 1),
+        "uncached_reads_per_flip": round(statistics.fmean(f["uncached_reads"] for f in per_flip), 1),
+        "wall_ms": round(statistics.fmean(f["wall_ms"] for f in per_flip), 1),
+        "flips": per_flip,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--flips", type=int, default=3, help="phase flips per player count")
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated backend round trip (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="sessions wake spread over this many seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="JSON file (default: bench_results/coalesce-<time>.json)")
+    args = parser.parse_args()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"flips": args.flips, "latency_s": args.latency, "jitter_s": args.jitter, "seed": args.seed},
+        "runs": {},
+    }
+    print(f"{'players':>7}  {'baseline req/flip':>17}  {'coalesced req/flip':>18}  {'baseline ms':>11}  {'coalesced ms':>12}",
+          file=sys.stderr)
+    split = lambda r: f"{r['requests_per_flip']} ({r['cached_reads_per_flip']:g}/{r['uncached_reads_per_flip']:g})"
+    for n in args.players:
+        base = run(n, args.flips, args.latency, args.jitter, False, args.seed)
+        coal = run(n, args.flips, args.latency, args.jitter, True, args.seed)
+        report["runs"][str(n)] = {"baseline": base, "coalesced": coal}
+        print(f"{n:>7}  {split(base):>17}  {split(coal):>18}  "
+              f"{base['wall_ms']:>11}  {coal['wall_ms']:>12}", file=sys.stderr)
+
+    out = args.out or os.path.join(ROOT, "bench_results", f"coalesce-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+🏋️ Load test: N simulated players + 1 admin through a full game.
+
+Runs the real admin.py / player.py scripts with Streamlit's AppTest against the
+local SQLite backend (backend.py), LOBBY -> INPUT -> VOTING -> RESULTS.
+Every client reruns once per poll tick, like the no-realtime fallback loop.
+
+Per phase it reports backend queries (total, per second, per rerun), bytes
+returned by the backend, p50/p99 rerun latency, and `catchup_s`: the time
+from the admin's write that moves game_state to the new phase until the first
+player read (player_view) that returns it. Players are rerun right after the
+admin's click, so that excludes the rerun_on_change poll interval a browser
+would wait on top.
+
+    python benchmarks/loadtest.py --players 10 50 100 --latency 0.005
+    python benchmarks/loadtest.py --players 200 --out bench_results/run.json
+
+Each player count runs in its own process so caches start cold.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_PASSWORD = "loadtest"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class PhaseClock:
+    """
+    Hooks the shared LocalBackend's execute() / call(): timestamps the write
+    that moves the room to the armed phase and the first player_view read
+    that returns it.
+    """
+
+    def __init__(self, backend, room="MAIN"):
+        self.backend = backend
+        self.room = room
+        self.arm(None)
+        execute, call = backend.execute, backend.call
+
+        def timed_execute(q):
+            response = execute(q)
+            if q.action != "select":
+                self._check_write()
+            return response
+
+        def timed_call(fn, params):
+            response = call(fn, params)
+            if fn == "player_view":
+                self._check_read(response.data)
+            else:
+                self._check_write()
+            return response
+
+        backend.execute, backend.call = timed_execute, timed_call
+
+    def arm(self, phase):
+        self.phase, self.written_at, self.seen_at = phase, None, None
+
+    def _check_write(self):
+        if self.phase is None or self.written_at is not None:
+            return
+        with self.backend._lock:
+            row = self.backend._db.execute("SELECT phase FROM game_state WHERE room_id = ?", (self.room,)).fetchone()
+        if row and row[0] == self.phase:
+            self.written_at = time.perf_counter()
+
+    def _check_read(self, view):
+        if self.written_at is not None and self.seen_at is None and (view or {}).get("phase") == self.phase:
+            self.seen_at = time.perf_counter()
+
+    def elapsed(self):
+        if self.written_at is None or self.seen_at is None:
+            return None
+        return self.seen_at - self.written_at
+
+
+class PhaseRecorder:
+    """Collects rerun timings and backend counters for one phase."""
+
+    def __init__(self, name, conn, clock):
+        self.name = name
+        self.conn = conn
+        self.clock = clock
+        self.latencies = []
+        self.catchup = None
+        self.transition = None
+        self.q0, self.b0, self.t0 = conn.queries, conn.bytes_out, time.perf_counter()
+
+    def run(self, at):
+        t = time.perf_counter()
+        at.run()
+        self.latencies.append(time.perf_counter() - t)
+        if at.exception:
+            raise RuntimeError(f"{self.name}: {[e.value for e in at.exception]}")
+        return at
+
+    def action(self, at, label, phase):
+        """Times an admin click that moves the game to `phase`."""
+        q0, t = self.conn.queries, time.perf_counter()
+        self.clock.arm(phase)
+        click(at, label)
+        self.run(at)
+        self.transition = {"latency_s": round(time.perf_counter() - t, 4), "queries": self.conn.queries - q0}
+        if self.clock.written_at is None:
+            raise RuntimeError(f"{label} didn't move the room to {phase}")
+
+    def report(self):
+        wall = time.perf_counter() - self.t0
+        queries = self.conn.queries - self.q0
+        out = {
+            "wall_s": round(wall, 3),
+            "reruns": len(self.latencies),
+            "queries": queries,
+            "queries_per_s": round(queries / wall, 1) if wall else 0.0,
+            "queries_per_rerun": round(queries / len(self.latencies), 2) if self.latencies else 0.0,
+            "bytes": self.conn.bytes_out - self.b0,
+            "rerun_p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "rerun_p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "rerun_mean_ms": round(statistics.fmean(self.latencies) * 1000, 2) if self.latencies else 0.0,
+        }
+        if self.catchup is not None:
+            out["catchup_s"] = round(self.catchup, 4)
+        if self.transition is not None:
+            out["transition"] = self.transition
+        return out
+
+
+def click(at, label):
+    next(b for b in at.button if label in b.label).click()
+
+
+def fill(at, label, value):
+    next(t for t in at.text_input if label in t.label).input(value)
+
+
+def sees(at, phase):
+    if phase == "INPUT":
+        return any(s.value.startswith("Q:") for s in at.subheader) and not at.radio
+    if phase == "VOTING":
+        return bool(at.radio) or any("Vote cast" in s.value for s in at.success)
+    if phase == "RESULTS":
+        return any("Correct Answer" in s.value for s in at.success)
+    return True
+
+
+def sweep(rec, players, phase=None):
+    """One poll tick: every player reruns once, in turn. With `phase`, all of them must show it."""
+    for p in players:
+        rec.run(p)
+    if phase:
+        missing = [i for i, p in enumerate(players) if not sees(p, phase)]
+        if missing:
+            raise RuntimeError(f"{len(missing)} players still not in {phase}")
+        rec.catchup = rec.clock.elapsed()
+
+
+def run_game(n_players, ticks, seed):
+    from streamlit.testing.v1 import AppTest
+    from backend import get_connection
+
+    rng = random.Random(seed)
+    conn = get_connection()
+    clock = PhaseClock(getattr(conn, "_conn", conn))
+    new_app = lambda name: AppTest.from_file(os.path.join(ROOT, name), default_timeout=60)
+    results = {}
+
+    # --- LOBBY: load questions, players join, admin admits everyone ---
+    admin = new_app("admin.py")
+    admin.secrets["admin"] = {"password": ADMIN_PASSWORD}
+    rec = PhaseRecorder("LOBBY", conn, clock)
+    rec.run(admin)
+    fill(admin, "Admin Password", ADMIN_PASSWORD)
+    click(admin, "Login")
+    rec.run(admin)
+    fill(admin, "GitHub Raw URL", os.path.join(ROOT, "Questions-AKH-Quiz.txt"))
+    click(admin, "Import Questions")
+    rec.run(admin)
+
+    players = []
+    for i in range(n_players):
+        p = new_app("player.py")
+        rec.run(p)
+        fill(p, "Nickname", f"player{i:04d}")
+        click(p, "Request to Join")
+        rec.run(p)
+        players.append(p)
+
+    rec.run(admin)
+    while any(b.label == "Admit" for b in admin.button):
+        click(admin, "Admit")
+        rec.run(admin)
+    for _ in range(ticks):
+        sweep(rec, players)
+        rec.run(admin)
+    rec.action(admin, "START GAME", "INPUT")
+    results["LOBBY"] = rec.report()
+
+    # --- INPUT: everyone submits a bluff, admin finalizes ---
+    rec = PhaseRecorder("INPUT", conn, clock)
+    sweep(rec, players, "INPUT")
+    for i, p in enumerate(players):
+        fill(p, "bluff", f"bluff {rng.randint(0, n_players)}")
+        click(p, "Submit")
+        rec.run(p)
+    for _ in range(ticks):
+        sweep(rec, players)
+        rec.run(admin)
+    rec.action(admin, "Save & Start Voting", "VOTING")
+    results["INPUT"] = rec.report()
+
+    # --- VOTING: everyone votes, admin reveals ---
+    rec = PhaseRecorder("VOTING", conn, clock)
+    sweep(rec, players, "VOTING")
+    for p in players:
+        radio = p.radio[0]
+        radio.set_value(rng.choice(radio.options))
+        click(p, "Cast Vote")
+        rec.run(p)
+    for _ in range(ticks):
+        sweep(rec, players)
+        rec.run(admin)
+    rec.action(admin, "Reveal Results", "RESULTS")
+    results["VOTING"] = rec.report()
+
+    # --- RESULTS: reveal + leaderboard on every screen ---
+    rec = PhaseRecorder("RESULTS", conn, clock)
+    sweep(rec, players, "RESULTS")
+    for _ in range(ticks - 1):
+        sweep(rec, players)
+        rec.run(admin)
+    results["RESULTS"] = rec.report()
+    return results
+
+
+def run_isolated(n_players, args):
+    """Runs one player count in a fresh process with its own database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, QUIZ_BACKEND="sqlite", QUIZ_DB=os.path.join(tmp, "load.db"),
+                   QUIZ_DB_LATENCY=str(args.latency))
+        cmd = [sys.executable, os.path.abspath(__file__), "--single", str(n_players),
+               "--ticks", str(args.ticks), "--seed", str(args.seed)]
+        out = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr[-2000:])
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--ticks", type=int, default=3, help="idle poll ticks per phase")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated backend round trip (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="JSON file (default: bench_results/loadtest-<time>.json)")
+    parser.add_argument("--single", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_game(args.single, args.ticks, args.seed)))
+        return
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"ticks": args.ticks, "latency_s": args.latency, "seed": args.seed},
+        "runs": {},
+    }
+    for n in args.players:
+        print(f"▶ {n} players...", file=sys.stderr)
+        report["runs"][str(n)] = run_isolated(n, args)
+        for phase, m in report["runs"][str(n)].items():
+            print(f"  {phase:8} {m['queries']:6} queries  {m['queries_per_rerun']:5} q/rerun  "
+                  f"p50 {m['rerun_p50_ms']:7} ms  p99 {m['rerun_p99_ms']:7} ms  {m['bytes']:9} B"
+                  + (f"  catch-up {m['catchup_s']} s" if "catchup_s" in m else ""), file=sys.stderr)
+
+    out = args.out or os.path.join(ROOT, "bench_results", f"loadtest-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
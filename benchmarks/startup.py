@@ -0,0 +1,136 @@
+"""
+⏱️ Startup benchmark: cold start and per-rerun CPU of the two apps.
+
+Seeds a throwaway SQLite game (one round in RESULTS, P players with bluffs
+and votes) and, for each app in its own fresh Python process, measures:
+  - cold start: first script run (imports, connection, first render),
+    wall and CPU time, and whether pandas got imported along the way
+  - steady state: CPU time per rerun over N reruns of the same page
+
+Runs the apps through streamlit's AppTest, logged in via session_state, so
+no browser or server is involved. --root points at another checkout of the
+repo to compare before/after:
+
+    python benchmarks/startup.py --players 12 --reruns 30
+    python benchmarks/startup.py --root /tmp/quiz_tool-old
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = ["admin.py", "player.py"]
+
+
+def seed(root, path, players):
+    """A game in room MAIN after its first reveal: questions, ballot, votes, logs."""
+    sys.path.insert(0, root)
+    from backend import LocalBackend
+
+    backend = LocalBackend(path)
+    names = [f"p{n}" for n in range(players)]
+    q = backend.table("questions").insert({"question_text": "Which one is true?", "correct_answer": "the truth"}).execute().data[0]
+    backend.table("players").insert([{"user_id": n, "status": "APPROVED"} for n in names]).execute()
+    backend.table("player_inputs").insert([
+        {"question_id": q['id'], "user_id": n, "answer_text": f"bluff {n}"} for n in names
+    ]).execute()
+    opts = backend.table("ballot_options").insert([
+        {"question_id": q['id'], "option_no": i + 1, "option_text": text, "is_correct": i == 0, "authors": authors}
+        for i, (text, authors) in enumerate([("the truth", [])] + [(f"bluff {n}", [n]) for n in names])
+    ]).execute().data
+    backend.table("player_votes").insert([
+        {"question_id": q['id'], "user_id": n, "option_id": opts[(i + 2) % len(opts)]['id'],
+         "voted_for": opts[(i + 2) % len(opts)]['option_text']} for i, n in enumerate(names)
+    ]).execute()
+    backend.table("game_state").update({
+        "phase": "RESULTS", "current_question_id": q['id'], "total_players": players,
+    }).eq("room_id", "MAIN").execute()
+
+
+def child(root, app, reruns):
+    # Runs in a fresh interpreter: everything imported from here on is the app's cold start
+    os.chdir(root)
+    sys.path.insert(0, root)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(root, app), default_timeout=60)
+    at.secrets["admin"] = {"password": "bench"}
+    if app == "admin.py":
+        at.session_state["admin_logged_in"] = True
+    else:
+        at.session_state["user_id"] = "p0"
+        at.session_state["room"] = "MAIN"
+    had_pandas = "pandas" in sys.modules
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    at.run()
+    cold = {"wall_ms": (time.perf_counter() - wall) * 1000, "cpu_ms": (time.process_time() - cpu) * 1000}
+    if at.exception:
+        raise SystemExit(f"{app}: {[e.value for e in at.exception]}")
+    cold["pandas_imported"] = "pandas" in sys.modules and not had_pandas
+
+    cpu_times = []
+    for _ in range(reruns):
+        cpu = time.process_time()
+        at.run()
+        cpu_times.append((time.process_time() - cpu) * 1000)
+    cpu_times.sort()
+    return {
+        "cold_start": {k: round(v, 1) if isinstance(v, float) else v for k, v in cold.items()},
+        "rerun_cpu_ms": {
+            "median": round(cpu_times[len(cpu_times) // 2], 2),
+            "p90": round(cpu_times[int(len(cpu_times) * 0.9)], 2),
+        },
+    }
+
+
+def measure(root, app, db, reruns):
+    env = dict(os.environ, QUIZ_BACKEND="sqlite", QUIZ_DB=db, QUIZ_DB_LATENCY="0")
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", app, "--root", root, "--reruns", str(reruns)],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    if out.returncode:
+        raise SystemExit(out.stderr or out.stdout)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=ROOT, help="checkout whose apps are measured (default: this one)")
+    parser.add_argument("--players", type=int, default=12)
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help="JSON file (default: bench_results/startup-<time>.json)")
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+
+    if args.child:
+        print(json.dumps(child(root, args.child, args.reruns)))
+        return
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": vars(args), "apps": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "startup.db")
+        seed(root, db, args.players)
+        for app in APPS:
+            report["apps"][app] = r = measure(root, app, db, args.reruns)
+            c, p = r["cold_start"], r["rerun_cpu_ms"]
+            print(f"{app:<10} cold start {c['wall_ms']:>7} ms wall / {c['cpu_ms']:>7} ms CPU"
+                  f"{' (imports pandas)' if c['pandas_imported'] else ''}; "
+                  f"rerun CPU median {p['median']} ms, p90 {p['p90']} ms", file=sys.stderr)
+
+    out = args.out or os.path.join(ROOT, "bench_results", f"startup-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
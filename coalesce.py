@@ -0,0 +1,114 @@
+import threading
+
+# ==========================================
+# 🔀 REQUEST COALESCING ("singleflight")
+# ==========================================
+# When a phase flips, every session wakes up at once and asks for the same
+# rows. Singleflight.do(key, fn) lets the first caller run fn(); callers that
+# arrive with the same key while it is still running wait for that result
+# instead of sending their own request. Nothing is stored afterwards: this
+# is about concurrent duplicates, caching is shared_cache.py's job.
+#
+# CoalescingConnection applies it to `conn`: read queries (postgrest GET /
+# HEAD, LocalBackend selects) with the same table, filters and projection
+# share one round trip. Writes and RPCs always go through on their own.
+# The shared response is the same object for every waiter; treat it as
+# read-only.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Singleflight:
+    def __init__(self):
+        self.counters = {"calls": 0, "shared": 0}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            self.counters["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.counters["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls))
+
+
+def read_key(query):
+    """Identity of a read query, or None when it must not be shared (writes, RPCs)."""
+    req = getattr(query, "request", None)
+    if req is not None:
+        # postgrest request builder: everything that shapes the response is in the URL + Prefer
+        if req.http_method not in ("GET", "HEAD"):
+            return None
+        return (req.http_method, str(req.path), str(req.params), req.headers.get("Prefer"))
+    if getattr(query, "action", None) == "select":
+        # backend.LocalQuery
+        return (query.table, tuple(query.columns), repr(query.filters), tuple(query.order_by),
+                query.limit_n, query.offset_n, query.count_method, query.head)
+    return None
+
+
+# Module-level instance: coalesces across every session in this server process
+reads = Singleflight()
+
+
+class _Query:
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _Query(result) if hasattr(result, "execute") else result
+        return chained
+
+    def execute(self):
+        key = read_key(self._query)
+        if key is None:
+            return self._query.execute()
+        return reads.do(key, self._query.execute)
+
+
+class CoalescingConnection:
+    """Drop-in wrapper for `conn`: identical concurrent reads share one request."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def table(self, name):
+        return _Query(self._conn.table(name))
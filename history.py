@@ -0,0 +1,126 @@
+import gzip
+import json
+import os
+import time
+
+from ballot import normalize_option
+from scoring import apply_votes
+
+# ==========================================
+# 📜 GAME HISTORY (event log replay + archives)
+# ==========================================
+# game_logs is the game's append-only event log (see log_sink.py for the
+# event types). Two of them make it replayable without the live tables:
+#   - BLUFFS_FINALIZED carries the round's ballot (option text, correct,
+#     authors), so a VOTE_CAST (voter + option text) can be scored alone
+#   - SCORES_END_ROUND is a compact snapshot of the totals at reveal
+# Scores at round k = the latest snapshot at or before k + the votes of
+# the rounds after it. GameHistory reads the log once and indexes it per
+# round, so per-round questions ("who fooled whom") are dict lookups.
+#
+# A finished game can be archived to a gzip'd JSON file (every table of the
+# room, events included) before the room is reset.
+
+ARCHIVE_DIR = os.environ.get("QUIZ_ARCHIVE_DIR", "archives")
+ARCHIVE_TABLES = ["game_state", "players", "questions", "player_inputs", "ballot_options", "player_votes", "game_logs"]
+
+
+def _details(event):
+    details = event.get('details')
+    if isinstance(details, str):
+        try:
+            return json.loads(details)
+        except ValueError:
+            return None
+    return details
+
+
+class GameHistory:
+    """One game's event log, indexed per round (round_id = question id)."""
+
+    def __init__(self, events):
+        self.rounds = []         # question ids in play order
+        self.ballots = {}        # round -> {normalized option text: (is_correct, authors)}
+        self.votes = {}          # round -> [(voter, option text)]
+        self.snapshots = {}      # round -> totals at reveal
+        self.fooled = {}         # round -> {bluffer: [fooled voters]}
+        self.events = 0
+        for e in sorted(events, key=lambda e: (e.get('created_at') or "", e.get('id') or 0)):
+            self._apply(e)
+
+    def _apply(self, event):
+        self.events += 1
+        kind, round_id, raw = event.get('log_type'), event.get('round_id'), _details(event)
+        d = raw or {}
+        if round_id is not None and kind in ("GAME_STARTED", "PHASE_CHANGED") and round_id not in self.rounds:
+            self.rounds.append(round_id)
+        if kind == "BLUFFS_FINALIZED" and isinstance(d.get('ballot'), list):
+            self.ballots[round_id] = {
+                normalize_option(o['option_text']): (bool(o['is_correct']), o.get('authors') or []) for o in d['ballot']
+            }
+            self.fooled[round_id] = {}
+            for voter, text in self.votes.get(round_id, []):
+                self._count_fooled(round_id, voter, text)
+        elif kind == "VOTE_CAST" and d.get('voted_for') is not None:
+            self.votes.setdefault(round_id, []).append((d['user_id'], d['voted_for']))
+            self._count_fooled(round_id, d['user_id'], d['voted_for'])
+        elif kind == "SCORES_END_ROUND" and isinstance(raw, dict):
+            # A null snapshot (scores couldn't be read at reveal) isn't "everyone at 0"
+            self.snapshots[round_id] = raw
+
+    def _count_fooled(self, round_id, voter, text):
+        ballot = self.ballots.get(round_id)
+        if ballot is None:
+            return
+        for bluffer in ballot.get(normalize_option(text), (False, []))[1]:
+            if bluffer != voter:
+                self.fooled[round_id].setdefault(bluffer, []).append(voter)
+
+    def _round_votes(self, round_id):
+        # Votes in apply_votes' shape; the option key is (round, normalized text)
+        return [{"user_id": voter, "option_id": (round_id, normalize_option(text)), "question_id": round_id,
+                 "voted_for": text} for voter, text in self.votes.get(round_id, [])]
+
+    def scores_at(self, round_id):
+        """Totals after `round_id`: latest snapshot at or before it + the votes since."""
+        played = self.rounds[:self.rounds.index(round_id) + 1] if round_id in self.rounds else list(self.rounds)
+        start, scores = 0, {}
+        for pos in range(len(played) - 1, -1, -1):
+            if played[pos] in self.snapshots:
+                start, scores = pos + 1, dict(self.snapshots[played[pos]])
+                break
+        option_map = {}
+        for r in played[start:]:
+            option_map.update({(r, text): entry for text, entry in self.ballots.get(r, {}).items()})
+            apply_votes(scores, self._round_votes(r), {}, {}, option_map)
+        return scores
+
+    def who_fooled_whom(self, round_id):
+        return self.fooled.get(round_id, {})
+
+
+def load_events(conn, room):
+    """The room's whole event log, oldest first (one query)."""
+    return conn.table("game_logs").select("*").eq("room_id", room).order("created_at").order("id").execute().data
+
+
+def archive_game(conn, room, folder=ARCHIVE_DIR):
+    """Writes every table of `room` to <folder>/<room>-<time>.json.gz; returns the path."""
+    tables = {t: conn.table(t).select("*").eq("room_id", room).execute().data for t in ARCHIVE_TABLES}
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{room}-{time.strftime('%Y%m%d-%H%M%S')}.json.gz")
+    with gzip.open(path + ".part", "wt", encoding="utf-8") as f:
+        json.dump({"room": room, "archived_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "tables": tables}, f, default=str)
+    os.replace(path + ".part", path)
+    return path
+
+
+def load_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_archives(folder=ARCHIVE_DIR):
+    if not os.path.isdir(folder):
+        return []
+    return sorted((os.path.join(folder, n) for n in os.listdir(folder) if n.endswith(".json.gz")), reverse=True)
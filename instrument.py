@@ -0,0 +1,272 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+# ==========================================
+# 📊 QUERY INSTRUMENTATION (one collector per server process)
+# ==========================================
+# InstrumentedConnection wraps `conn` so every `.execute()` is timed and
+# attributed to the app helper that issued it (get_state, get_inputs, ...),
+# found by walking up the call stack to the first function defined in
+# admin.py / player.py. Reruns are tracked per script run (one thread each).
+#
+# admin.py and player.py usually run as separate `streamlit run` processes,
+# each with its own collector. Every process writes its snapshot to
+# METRICS_DIR/<host>-<pid>.json (at most every SHARE_INTERVAL seconds, from
+# start_rerun), and the admin's Performance panel merges all of them
+# (Metrics.combined). QUIZ_METRICS_DIR= (empty) turns the sharing off.
+
+APP_FILES = ("admin.py", "player.py")
+INNER_NAMES = {"op", "<lambda>"}   # run_safe closures -> attribute to the enclosing helper
+
+METRICS_DIR = os.environ.get("QUIZ_METRICS_DIR", ".metrics")
+SHARE_INTERVAL = 5.0
+SHARE_MAX_AGE = 3600.0   # snapshots not refreshed for this long belong to stopped processes
+RESET_FILE = "RESET"     # touched by reset_all(); every process clears its counters once it sees it
+
+
+def caller_label():
+    f = sys._getframe(1)
+    while f is not None:
+        code = f.f_code
+        if code.co_filename.endswith(APP_FILES) and code.co_name not in INNER_NAMES:
+            return "<script>" if code.co_name == "<module>" else code.co_name
+        f = f.f_back
+    return "<other>"
+
+
+def merge_snapshots(snapshots):
+    """One snapshot out of several processes' snapshots (sums; maxima for the max_* fields)."""
+    helpers, per_app, reruns = {}, {}, []
+    for snap in snapshots:
+        for name, h in snap["helpers"].items():
+            into = helpers.setdefault(name, dict.fromkeys(h, 0))
+            for k, v in h.items():
+                into[k] = max(into.get(k, 0), v) if k == "max_ms" else into.get(k, 0) + v
+        for name, a in snap["apps"].items():
+            into = per_app.setdefault(name, {"reruns": 0, "queries": 0, "wall_ms": 0.0, "max_queries": 0})
+            into["reruns"] += a["reruns"]
+            into["queries"] += a["queries"]
+            into["wall_ms"] += a["wall_ms"]
+            into["max_queries"] = max(into["max_queries"], a["max_queries"])
+        reruns.extend(snap["recent_reruns"])
+    for a in per_app.values():
+        a["queries_per_rerun"] = round(a["queries"] / a["reruns"], 2)
+        a["db_ms_per_rerun"] = round(a["wall_ms"] / a["reruns"], 2)
+    return {
+        "since": min((s["since"] for s in snapshots), default=time.time()),
+        "processes": len(snapshots),
+        "helpers": helpers,
+        "apps": per_app,
+        "recent_reruns": sorted(reruns, key=lambda r: r["at"])[-50:],
+    }
+
+
+class Metrics:
+    def __init__(self, keep_reruns=500, share_dir=METRICS_DIR, share_interval=SHARE_INTERVAL):
+        self.helpers = {}
+        self.reruns = deque(maxlen=keep_reruns)
+        self.started = time.time()
+        self.share_dir = share_dir
+        self.share_interval = share_interval
+        self.process = f"{socket.gethostname()}-{os.getpid()}"
+        self._shared_at = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start_rerun(self, app):
+        rec = {"app": app, "at": time.time(), "queries": 0, "rows": 0, "wall_ms": 0.0, "retries": 0}
+        with self._lock:
+            self.reruns.append(rec)
+        self._local.rerun = rec
+        self.share()
+
+    def _helper(self, label):
+        h = self.helpers.get(label)
+        if h is None:
+            h = self.helpers[label] = {"queries": 0, "rows": 0, "wall_ms": 0.0, "max_ms": 0.0, "retries": 0, "errors": 0}
+        return h
+
+    def record_query(self, label, wall, rows, ok=True):
+        ms = wall * 1000
+        with self._lock:
+            h = self._helper(label)
+            h["queries"] += 1
+            h["rows"] += rows
+            h["wall_ms"] += ms
+            h["max_ms"] = max(h["max_ms"], ms)
+            h["errors"] += 0 if ok else 1
+            rec = getattr(self._local, "rerun", None)
+            if rec is not None:
+                rec["queries"] += 1
+                rec["rows"] += rows
+                rec["wall_ms"] += ms
+
+    def record_retry(self):
+        label = caller_label()
+        with self._lock:
+            self._helper(label)["retries"] += 1
+            rec = getattr(self._local, "rerun", None)
+            if rec is not None:
+                rec["retries"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            helpers = {k: dict(v) for k, v in self.helpers.items()}
+            reruns = [dict(r) for r in self.reruns]
+        per_app = {}
+        for r in reruns:
+            a = per_app.setdefault(r["app"], {"reruns": 0, "queries": 0, "wall_ms": 0.0, "max_queries": 0})
+            a["reruns"] += 1
+            a["queries"] += r["queries"]
+            a["wall_ms"] += r["wall_ms"]
+            a["max_queries"] = max(a["max_queries"], r["queries"])
+        for a in per_app.values():
+            a["queries_per_rerun"] = round(a["queries"] / a["reruns"], 2)
+            a["db_ms_per_rerun"] = round(a["wall_ms"] / a["reruns"], 2)
+        return {"since": self.started, "helpers": helpers, "apps": per_app, "recent_reruns": reruns[-50:]}
+
+    # --- sharing between processes ---
+    def _path(self, name):
+        return os.path.join(self.share_dir, name)
+
+    def share(self, force=False):
+        """Writes this process's snapshot for the other processes (throttled to share_interval)."""
+        now = time.monotonic()
+        if not self.share_dir or (not force and now - self._shared_at < self.share_interval):
+            return
+        self._shared_at = now
+        try:
+            if os.path.getmtime(self._path(RESET_FILE)) > self.started:
+                self.reset()
+        except OSError:
+            pass
+        path = self._path(f"{self.process}.json")
+        tmp = f"{path}.{threading.get_ident()}.part"
+        try:
+            os.makedirs(self.share_dir, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _shared(self):
+        """Snapshots the other processes shared recently."""
+        try:
+            names = os.listdir(self.share_dir) if self.share_dir else []
+        except OSError:
+            return []
+        out = []
+        for name in names:
+            if not name.endswith(".json") or name == f"{self.process}.json":
+                continue
+            try:
+                if time.time() - os.path.getmtime(self._path(name)) > SHARE_MAX_AGE:
+                    continue
+                with open(self._path(name), encoding="utf-8") as f:
+                    out.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return out
+
+    def combined(self):
+        """This process's live snapshot merged with every other process's (admin + player servers)."""
+        return merge_snapshots([self.snapshot()] + self._shared())
+
+    def helper_rows(self, snapshot=None):
+        """Helpers as table rows, busiest first."""
+        rows = []
+        for name, h in (snapshot or self.snapshot())["helpers"].items():
+            rows.append({
+                "Helper": name, "Queries": h["queries"], "Rows": h["rows"],
+                "Total ms": round(h["wall_ms"], 1),
+                "Avg ms": round(h["wall_ms"] / h["queries"], 2) if h["queries"] else 0.0,
+                "Max ms": round(h["max_ms"], 1), "Retries": h["retries"], "Errors": h["errors"],
+            })
+        return sorted(rows, key=lambda r: r["Total ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.helpers.clear()
+            self.reruns.clear()
+            self.started = time.time()
+
+    def reset_all(self):
+        """Clears the counters of every process: they reset themselves on their next share()."""
+        if self.share_dir:
+            try:
+                os.makedirs(self.share_dir, exist_ok=True)
+                with open(self._path(RESET_FILE), "w", encoding="utf-8") as f:
+                    f.write(str(time.time()))
+                for name in os.listdir(self.share_dir):
+                    if name.endswith(".json"):
+                        os.remove(self._path(name))
+            except OSError:
+                pass
+        self.reset()
+
+
+metrics = Metrics()
+
+
+# ==========================================
+# 🔍 CONNECTION WRAPPER
+# ==========================================
+class _Query:
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _Query(result) if hasattr(result, "execute") else result
+        return chained
+
+    def execute(self):
+        label = caller_label()
+        start = time.perf_counter()
+        try:
+            res = self._query.execute()
+        except Exception:
+            metrics.record_query(label, time.perf_counter() - start, 0, ok=False)
+            raise
+        data = getattr(res, "data", None)
+        metrics.record_query(label, time.perf_counter() - start, len(data) if isinstance(data, list) else 0)
+        return res
+
+
+class _Client:
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def rpc(self, *args, **kwargs):
+        return _Query(self._client.rpc(*args, **kwargs))
+
+
+class InstrumentedConnection:
+    """Drop-in wrapper for `conn`: same table()/client API, every query recorded."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def table(self, name):
+        return _Query(self._conn.table(name))
+
+    @property
+    def client(self):
+        return _Client(self._conn.client)
@@ -0,0 +1,221 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from resilience import resilience
+
+# ==========================================
+# 📜 GAME LOG SINK (one writer thread per server process)
+# ==========================================
+# log() only puts the event on a bounded in-memory queue, so user actions
+# never wait for a game_logs insert. A background thread writes batches of
+# up to `batch_size` rows, at the latest `flush_interval` seconds after the
+# first queued event. Batches that can't be written (backend down, circuit
+# open) and events that don't fit in the queue go to a local spool file
+# (JSON lines), which is replayed before the next successful write. close()
+# runs at interpreter exit and writes whatever is left.
+#
+# flush() only covers this process. The admin and player apps usually run as
+# separate servers, each with its own sink: a player's VOTE_CAST is written by
+# the player server's writer, at the latest flush_interval after the vote
+# (later only if it had to be spooled while the backend was down).
+
+# Event types (game_logs.log_type)
+BLUFFS_FINALIZED = "BLUFFS_FINALIZED"
+SCORES_END_ROUND = "SCORES_END_ROUND"
+GAME_STARTED = "GAME_STARTED"
+PLAYER_JOINED = "PLAYER_JOINED"
+PLAYER_ADMITTED = "PLAYER_ADMITTED"
+INPUT_SUBMITTED = "INPUT_SUBMITTED"
+VOTE_CAST = "VOTE_CAST"
+PHASE_CHANGED = "PHASE_CHANGED"
+
+SPOOL_PATH = os.environ.get("QUIZ_LOG_SPOOL", "game_logs.spool.jsonl")
+
+
+class _Flush:
+    """Queued by flush(): the writer sets `done` once everything queued before it is written."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class LogSink:
+    def __init__(self, batch_size=50, flush_interval=2.0, max_queue=2000, spool_path=SPOOL_PATH, runner=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.runner = runner or resilience.run
+        self.conn = None
+        self.counters = {"queued": 0, "written": 0, "batches": 0, "spooled": 0, "replayed": 0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        # One writer at a time (writer thread, flush(), close()): batches reach
+        # the table in order and the spool is never replayed twice at once
+        self._write_lock = threading.Lock()
+
+    def start(self, conn):
+        """Binds the connection and starts the writer thread (once per process)."""
+        with self._lock:
+            self.conn = conn
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] += amount
+
+    # --- producer side (called from the apps) ---
+    def log(self, room, round_id, log_type, details):
+        """Queues one game_logs row; never blocks and never raises."""
+        event = {
+            "room_id": room,
+            "round_id": round_id,
+            "log_type": log_type,
+            "details": json.dumps(details),
+            # Stamped now, not at flush time, so the log order is the event order
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        }
+        try:
+            self._queue.put_nowait(event)
+            self._count("queued")
+        except queue.Full:
+            self._spool([event])
+
+    # --- writer thread ---
+    def _run(self):
+        while not self._stop.is_set():
+            batch, marker = self._take()
+            if batch:
+                self._write(batch)
+            if marker is not None:
+                marker.done.set()
+
+    def _take(self):
+        """
+        Waits for events; returns (batch, None) when the batch is full or
+        flush_interval after the first one, or (batch, marker) right away when
+        it reaches a flush() marker.
+        """
+        batch, deadline = [], None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if isinstance(item, _Flush):
+                return batch, item
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch, None
+
+    def _insert(self, rows):
+        def op():
+            self.conn.table("game_logs").insert(rows).execute()
+            return True
+        return self.conn is not None and bool(self.runner(op))
+
+    def _write(self, batch):
+        with self._write_lock:
+            # Older spooled events go first, so the table stays in event order
+            if os.path.exists(self.spool_path) and not self._replay_spool():
+                self._spool(batch)
+                return
+            if self._insert(batch):
+                self._count("written", len(batch))
+                self._count("batches")
+            else:
+                self._spool(batch)
+
+    # --- spool file ---
+    def _spool(self, events):
+        with self._spool_lock:
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for e in events:
+                    f.write(json.dumps(e) + "\n")
+        self._count("spooled", len(events))
+
+    def _replay_spool(self):
+        """Writes the spool file to the backend; True once it's empty. Called under _write_lock."""
+        with self._spool_lock:
+            try:
+                with open(self.spool_path, encoding="utf-8") as f:
+                    events = [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                return True
+            for start in range(0, len(events), self.batch_size):
+                if not self._insert(events[start:start + self.batch_size]):
+                    # Keep what didn't make it for the next attempt
+                    with open(self.spool_path, "w", encoding="utf-8") as f:
+                        for e in events[start:]:
+                            f.write(json.dumps(e) + "\n")
+                    return False
+                self._count("replayed", len(events[start:start + self.batch_size]))
+            os.remove(self.spool_path)
+            return True
+
+    # --- shutdown ---
+    def flush(self, timeout=10.0):
+        """
+        Blocks until every event logged so far in this process is written (or
+        spooled), including a batch the writer thread is already holding.
+        Returns False if that took longer than `timeout` seconds.
+        """
+        if self._thread is not None and self._thread.is_alive() and not self._stop.is_set():
+            # The writer owns the queue: hand it a marker and wait until it got that far
+            marker = _Flush()
+            try:
+                self._queue.put(marker, timeout=timeout)
+            except queue.Full:
+                return False
+            return marker.done.wait(timeout)
+
+        # No writer thread (not started / closed): drain the queue here
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Flush):
+                item.done.set()
+            else:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+        return True
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            # Wakes the writer if it is waiting on an empty queue
+            try:
+                self._queue.put_nowait(_Flush())
+            except queue.Full:
+                pass
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+        out["pending"] = self._queue.qsize()
+        out["spool"] = os.path.exists(self.spool_path)
+        return out
+
+
+# Module-level instance: one queue and writer thread per server process
+log_sink = LogSink()
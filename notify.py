@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+import streamlit as st
+
+from rooms import topic
+from shared_cache import shared_cache
+
+# ==========================================
+# 📣 CHANGE NOTIFICATIONS (one hub per server process)
+# ==========================================
+# Topics are "<room>/<table>", plus "<room>/players:<user_id>" for a single
+# player's admission status (see rooms.topic) and "<room>/reset" after a Hard
+# Reset. Writers in this process publish
+# directly; writes from other processes arrive through Supabase Realtime.
+# Both apps use the session helpers at the bottom (publish, mark_rendered,
+# rerun_on_change); ChangeHub itself has no Streamlit dependency.
+#
+# Realtime needs the tables in the supabase_realtime publication:
+#   alter publication supabase_realtime add table
+#     game_state, players, questions, player_inputs, player_votes;
+
+WATCHED_TABLES = ["game_state", "players", "questions", "player_inputs", "player_votes"]
+RESET = "reset"   # Hard Reset of a room (scorers check for wiped votes)
+
+LIVE_HEARTBEAT = 30.0   # Safety rerun while realtime is connected (missed events)
+
+
+class ChangeHub:
+    """
+    In-memory pub/sub: every topic has a version counter that goes up on each publish.
+    Sessions remember the versions they rendered and rerun once one of them moves.
+    """
+
+    def __init__(self):
+        self.live = False   # True while a realtime subscription is feeding this hub
+        self._versions = {}
+        self._cond = threading.Condition()
+
+    def publish(self, *topics):
+        """Bumps `topics` and returns their new versions."""
+        with self._cond:
+            for t in topics:
+                self._versions[t] = self._versions.get(t, 0) + 1
+            self._cond.notify_all()
+            published = {t: self._versions[t] for t in topics}
+        for t in topics:
+            room, _, name = t.rpartition("/")
+            if name == "game_state":
+                shared_cache.invalidate(("game_state", room))
+            elif name == "players" or name.startswith("players:"):
+                shared_cache.invalidate(("players", room))
+            elif name == "player_votes":
+                shared_cache.invalidate(("scores", room))
+            elif name in ("questions", RESET):
+                # Import / Hard Reset: that room's questions, ballots and bank pages
+                shared_cache.invalidate_room(room)
+        return published
+
+    def version(self, topic):
+        with self._cond:
+            return self._versions.get(topic, 0)
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self._versions)
+
+    def changed_since(self, seen, topics):
+        """True if any of `topics` was published after the `seen` snapshot."""
+        with self._cond:
+            return any(self._versions.get(t, 0) != seen.get(t, 0) for t in topics)
+
+    def wait(self, seen, topics, timeout):
+        """Blocks until one of `topics` changes (True) or `timeout` runs out (False)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not any(self._versions.get(t, 0) != seen.get(t, 0) for t in topics):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+
+hub = ChangeHub()
+
+
+# ==========================================
+# 🔌 SUPABASE REALTIME BRIDGE
+# ==========================================
+_realtime_thread = None
+_realtime_lock = threading.Lock()
+
+
+def _on_change(payload):
+    data = payload.get("data", {})
+    table = data.get("table")
+    row = data.get("record") or data.get("old_record") or {}
+    room = row.get("room_id")
+    if not room:
+        # DELETEs only carry the primary key -> wake that table in every room
+        topics = [t for t in hub.snapshot() if t.endswith(f"/{table}")]
+        if table == "player_votes":
+            # Votes are only ever deleted by a Hard Reset
+            topics += [f"{t.rpartition('/')[0]}/{RESET}" for t in topics]
+    else:
+        topics = [topic(room, table)]
+        if table == "players" and row.get("user_id"):
+            topics.append(topic(room, f"players:{row['user_id']}"))
+    if topics:
+        hub.publish(*topics)
+
+
+def _on_status(status, err):
+    hub.live = status == "SUBSCRIBED"
+
+
+async def _listen(url, key):
+    from realtime import AsyncRealtimeClient
+
+    client = AsyncRealtimeClient(f"{url}/realtime/v1", key)
+    await client.connect()
+    channel = client.channel("quiz-changes")
+    for table in WATCHED_TABLES:
+        channel.on_postgres_changes("*", callback=_on_change, table=table, schema="public")
+    await channel.subscribe(_on_status)
+    while True:
+        await asyncio.sleep(60)
+
+
+def _run(url, key):
+    try:
+        asyncio.run(_listen(url, key))
+    except Exception:
+        pass
+    # Connection lost for good -> sessions fall back to polling
+    hub.live = False
+
+
+def start_realtime(url, key):
+    """Starts the background realtime listener once per process."""
+    global _realtime_thread
+    with _realtime_lock:
+        if _realtime_thread is None and url and key:
+            _realtime_thread = threading.Thread(target=_run, args=(url, key), daemon=True, name="quiz-realtime")
+            _realtime_thread.start()
+    return _realtime_thread is not None
+
+
+# ==========================================
+# 🔁 SESSION HELPERS (shared by admin.py and player.py)
+# ==========================================
+@st.cache_resource
+def start_notifications(_conn):
+    # Realtime is opt-in: set [realtime] enabled = true in secrets
+    try:
+        enabled = st.secrets["realtime"]["enabled"]
+    except Exception:
+        enabled = False
+    if enabled:
+        return start_realtime(getattr(_conn, "_url", None), getattr(_conn, "_key", None))
+    return False
+
+
+def publish(*topics):
+    # Our own writes shouldn't wake our own session (it reruns by itself)
+    st.session_state.setdefault("seen_versions", {}).update(hub.publish(*topics))
+
+
+def mark_rendered():
+    """Called at the top of every full run: the versions this run renders, and when."""
+    st.session_state.seen_versions = hub.snapshot()
+    st.session_state.last_run_at = time.monotonic()
+
+
+@st.fragment(run_every=1)
+def rerun_on_change(topics, fallback):
+    # Only reads in-memory counters. The full script reruns when a topic moved,
+    # or every `fallback` seconds while realtime isn't connected.
+    if hub.changed_since(st.session_state.seen_versions, topics):
+        st.rerun()
+    elapsed = time.monotonic() - st.session_state.last_run_at
+    if elapsed >= (LIVE_HEARTBEAT if hub.live else fallback):
+        st.rerun()
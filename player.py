@@ -1,93 +1,213 @@
 import streamlit as st
-from st_supabase_connection import SupabaseConnection
 import time
-import random
-import pandas as pd
+import uuid
+from backend import get_connection
+from scoring import IncrementalScorer
+from shared_cache import shared_cache, STATE_TTL, QUESTION_TTL, SCORES_TTL
+from resilience import run_safe, start_rerun, resilience, is_transient
+from instrument import InstrumentedConnection, metrics
+from notify import hub, start_notifications, publish, mark_rendered, rerun_on_change, RESET
+from rooms import DEFAULT_ROOM, normalize_room, topic
+from ballot import ballot_order
+from log_sink import log_sink, PLAYER_JOINED, INPUT_SUBMITTED, VOTE_CAST
+from assets import load_waiting_images, pick_waiting_image
+from ui import small_table, leaderboard
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Play Quiz", layout="centered")
-conn = st.connection("supabase", type=SupabaseConnection)
 
-# 🖼️ CUSTOM IMAGES (Add your URLs here)
-# You can use GitHub Raw URLs or any hosted image link.
-WAITING_IMAGES = [
+@st.cache_resource
+def app_connection():
+    # Once per process, not per rerun: the backend (Supabase by default;
+    # QUIZ_BACKEND=sqlite runs fully offline, see backend.py), its wrappers, and
+    # the background game_logs writer bound to it (see log_sink.py)
+    conn = InstrumentedConnection(get_connection())
+    log_sink.start(conn)
+    return conn
+
+conn = app_connection()
+
+# 🖼️ CUSTOM IMAGES: drop GIF/PNG/JPG/WebP files into Images/.
+# These URLs are only used when Images/ is empty: the server downloads them
+# once in the background and serves local copies (see assets.py), phones
+# never hotlink them.
+WAITING_IMAGE_URLS = (
     "https://media.giphy.com/media/xTkcEQACH24SMPxIQg/giphy.gif",
     "https://media.giphy.com/media/l0HlBO7eyXzSZkJri/giphy.gif",
-    "https://media.giphy.com/media/tXL4FHPSnVJ0A/giphy.gif"
-]
+    "https://media.giphy.com/media/tXL4FHPSnVJ0A/giphy.gif",
+)
+WAITING_IMAGES = load_waiting_images(WAITING_IMAGE_URLS)
 
 # --- SAFETY WRAPPER ---
-def run_safe(operation):
-    try:
-        return operation()
-    except Exception:
-        time.sleep(1)
-        try:
-            return operation()
-        except Exception:
-            return None
+# Backoff + jitter, per-rerun time budget and circuit breaker live in resilience.py
+start_rerun()
+metrics.start_rerun("player")
+resilience.on_retry = metrics.record_retry
 
 # --- HELPER FUNCTIONS ---
+# All scoped to the player's room (`room`, chosen at join time).
+# game_state and question rows are identical for every session -> shared cache
 def get_state():
-    def op(): return conn.table("game_state").select("*").eq("id", 1).execute().data[0]
-    return run_safe(op)
+    def op(): return conn.table("game_state").select("*").eq("room_id", room).execute().data[0]
+    return shared_cache.get(("game_state", room), lambda: run_safe(op), ttl=STATE_TTL)
 
 def get_current_question(q_id):
     def op(): return conn.table("questions").select("*").eq("id", q_id).execute().data[0]
-    return run_safe(op)
+    return shared_cache.get(("questions", room, q_id), lambda: run_safe(op), ttl=QUESTION_TTL)
 
-def check_player_status(user_id):
+def get_ballot(q_id):
+    # Built once by the admin when voting starts, then frozen -> shared by all voters
     def op():
-        res = conn.table("players").select("status").eq("user_id", user_id).execute().data
-        return res[0]['status'] if res else None
-    return run_safe(op)
+        rows = conn.table("ballot_options").select("id, option_text").eq("question_id", q_id).order("option_no").execute().data
+        return [{"id": r['id'], "text": r['option_text']} for r in rows]
+    return shared_cache.get(("ballot", room, q_id), lambda: run_safe(op), ttl=QUESTION_TTL)
+
+def get_statuses():
+    # user_id -> status for the whole room: one query per room, shared by every polling session
+    def op(): return {r['user_id']: r['status'] for r in conn.table("players").select("user_id, status").eq("room_id", room).execute().data}
+    return shared_cache.get(("players", room), lambda: run_safe(op), ttl=STATE_TTL)
+
+def check_player_status(user_id):
+    return (get_statuses() or {}).get(user_id)
 
 def register_player(user_id):
     def op():
-        conn.table("players").upsert({"user_id": user_id, "status": "PENDING"}).execute()
+        conn.table("players").upsert(
+            {"room_id": room, "user_id": user_id, "status": "PENDING"}, on_conflict="room_id,user_id"
+        ).execute()
     run_safe(op)
+    log_sink.log(room, None, PLAYER_JOINED, {"user_id": user_id})
+    publish(topic(room, "players"), topic(room, f"players:{user_id}"))
+
+def submit_once(fn, params, table, row):
+    """
+    Writes our bluff / vote in one round trip, at most once per question.
+    The `fn` RPC (sql/submissions.sql) inserts unless we already answered or
+    the phase moved on and returns the stored row. The token is fixed for
+    this click, so a retry whose first attempt landed still finds its own
+    row. Returns True when the stored row is this submission.
+    Without the RPC: an upsert that ignores duplicates on (question_id, user_id).
+    """
+    token = uuid.uuid4().hex
+    if not st.session_state.get("no_submit_rpc"):
+        def op():
+            try:
+                return conn.client.rpc(fn, {**params, "p_token": token}).execute().data
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                st.session_state.no_submit_rpc = True
+        stored = run_safe(op)
+        if not st.session_state.get("no_submit_rpc"):
+            return bool(stored) and stored.get('submit_token') == token
 
-def calculate_leaderboard():
     def op():
-        # Fetch all data needed for scoring
-        all_votes = conn.table("player_votes").select("*").execute().data
-        all_inputs = conn.table("player_inputs").select("*").execute().data
-        all_qs = conn.table("questions").select("*").execute().data
-        
-        q_map = {q['id']: q['correct_answer'] for q in all_qs}
-        bluff_map = {(i['question_id'], i['answer_text']): i['user_id'] for i in all_inputs}
-        
-        scores = {}
-        for v in all_votes:
-            voter = v['user_id']
-            qid = v['question_id']
-            choice = v['voted_for']
-            
-            # Init
-            scores[voter] = scores.get(voter, 0)
-            
-            # Points for Correct
-            if choice == q_map.get(qid):
-                scores[voter] += 10
-            
-            # Points for Bluffing
-            bluffer = bluff_map.get((qid, choice))
-            if bluffer and bluffer != voter:
-                scores[bluffer] = scores.get(bluffer, 0) + 5
-        return scores
-    return run_safe(op) or {}
+        return conn.table(table).upsert(
+            {**row, "submit_token": token}, on_conflict="question_id,user_id", ignore_duplicates=True
+        ).execute().data
+    stored = run_safe(op)
+    return bool(stored) and stored[0].get('submit_token') == token
 
-# --- MAIN APP LOGIC ---
+def submit_input(q_id, ans):
+    return submit_once(
+        "submit_input",
+        {"p_room_id": room, "p_question_id": q_id, "p_user_id": user_id, "p_answer_text": ans},
+        "player_inputs",
+        {"room_id": room, "user_id": user_id, "question_id": q_id, "answer_text": ans},
+    )
+
+def cast_vote(q_id, option_id, choice):
+    return submit_once(
+        "cast_vote",
+        {"p_room_id": room, "p_question_id": q_id, "p_user_id": user_id, "p_option_id": option_id, "p_voted_for": choice},
+        "player_votes",
+        {"room_id": room, "user_id": user_id, "question_id": q_id, "option_id": option_id, "voted_for": choice},
+    )
+
+@st.cache_resource
+def get_scorer(room_id):
+    # One running scoreboard per room and server process, shared by every session
+    return IncrementalScorer(room_id)
+
+def calculate_leaderboard():
+    # Only votes added since the last call are read (see scoring.py); every
+    # player's RESULTS rerun shares one refresh per room until a vote lands
+    def op(): return get_scorer(room).refresh(conn, hub.version(topic(room, RESET)))
+    return shared_cache.get(("scores", room), lambda: run_safe(op), ttl=SCORES_TTL) or {}
+
+def get_player_view():
+    """
+    Everything one rerun needs in a single round trip: status, phase, question,
+    whether we already answered / voted, and the ballot (VOTING) or the reveal
+    (RESULTS). Uses the player_view RPC (sql/player_view.sql); falls back to
+    build_player_view() when the function isn't installed.
+    """
+    if not st.session_state.get("no_view_rpc"):
+        def op():
+            try:
+                return conn.client.rpc("player_view", {"p_room_id": room, "p_user_id": user_id}).execute().data
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                # Function not installed -> separate queries for the rest of this session
+                st.session_state.no_view_rpc = True
+        view = run_safe(op)
+        if not st.session_state.get("no_view_rpc"):
+            return view
+    return build_player_view()
+
+def build_player_view():
+    # Same payload as player_view, assembled from the per-table queries
+    state = get_state()
+    if not state:
+        return None
+    phase, q_id = state['phase'], state['current_question_id']
+    q = get_current_question(q_id) if q_id else None
+
+    def mine(table):
+        def op(): return conn.table(table).select("id").eq("question_id", q_id).eq("user_id", user_id).limit(1).execute().data
+        return bool(run_safe(op))
+
+    def bluffs(columns):
+        def op(): return conn.table("player_inputs").select(columns).eq("question_id", q_id).order("id").execute().data
+        return run_safe(op) or []
+
+    view = {
+        "status": check_player_status(user_id),
+        "phase": phase,
+        "question_id": q_id,
+        "question_text": q['question_text'] if q else None,
+        "round": (state.get('playlist_pos') or 0) + 1,
+        "rounds": len(state.get('playlist') or []),
+        "submitted": mine("player_inputs") if q and phase == "INPUT" else False,
+        "voted": mine("player_votes") if q and phase == "VOTING" else False,
+        "options": None, "correct_answer": None, "reveal": None,
+    }
+    if q and phase == "VOTING":
+        view["options"] = get_ballot(q_id) or []
+    elif q and phase == "RESULTS":
+        view["correct_answer"] = q['correct_answer']
+        view["reveal"] = bluffs("answer_text,user_id")
+    return view
 
 # --- MAIN APP LOGIC ---
+# Change notifications (publish / rerun_on_change): see notify.py
+start_notifications(conn)
 
 # 1. LOGIN SCREEN
 if "user_id" not in st.session_state:
     st.title("🎲 Join Quiz")
     uid = st.text_input("Enter Nickname")
+    room_code = st.text_input("Room Code", value=st.query_params.get("room", DEFAULT_ROOM))
     
     if st.button("Request to Join"):
         if uid:
+            room = normalize_room(room_code)
+            if not get_state():
+                st.error(f"No game found for room {room}.")
+                st.stop()
+            st.session_state.room = room
+            
             # GHOST PLAYER BACKDOOR
             if uid == "GhostPlayer":
                 st.session_state.user_id = uid
@@ -119,134 +239,105 @@ if "user_id" not in st.session_state:
     
 # 2. STATUS CHECK
 user_id = st.session_state.user_id
+room = st.session_state.get("room", DEFAULT_ROOM)
 is_ghost = st.session_state.get("is_ghost", False)
+mark_rendered()
 
+# Waiting room: answered from the room's shared status map (one query per
+# room for every polling session), not a per-player player_view call
 if not is_ghost:
     status = check_player_status(user_id)
     if status == "PENDING":
         st.info(f"Hi **{user_id}**! Waiting for Admin to admit you...")
-        # Random Waiting Image
+        # Waiting image: same one on every rerun of this session
         if WAITING_IMAGES:
-            st.image(random.choice(WAITING_IMAGES))
-        time.sleep(3)
-        st.rerun()
+            st.image(pick_waiting_image(WAITING_IMAGES))
+        # Wake up as soon as the admin admits us
+        rerun_on_change([topic(room, f"players:{user_id}")], fallback=3)
+        st.stop()
     elif status == "BANNED":
         st.error("Access Denied.")
         st.stop()
 
+# Admitted: one round trip for the whole rerun (phase, question, ballot)
+view = get_player_view()
+if not view:
+    st.write("Connecting...")
+    time.sleep(1)
+    st.rerun()
+
 # 3. GAME LOOP
 if is_ghost:
     st.warning("👻 GHOST MODE ACTIVE (Read Only)")
 
-st.write(f"👤 Playing as: **{user_id}**")
+st.write(f"👤 Playing as: **{user_id}** · Room **{room}**")
+if view['phase'] != "LOBBY" and view.get('rounds'):
+    st.caption(f"Round {view['round']} of {view['rounds']}")
 st.divider()
 
-state = get_state()
-if not state:
-    st.write("Connecting...")
-    time.sleep(1)
-    st.rerun()
-
-phase = state['phase']
-q_id = state['current_question_id']
+phase = view['phase']
+q_id = view['question_id']
 
 # --- PHASE: LOBBY ---
 if phase == "LOBBY":
     st.info("You are in! Waiting for game start...")
     if WAITING_IMAGES:
-        st.image(random.choice(WAITING_IMAGES))
+        st.image(pick_waiting_image(WAITING_IMAGES))
 
 # --- PHASE: INPUT ---
 elif phase == "INPUT":
-    q = get_current_question(q_id)
-    if q:
-        st.subheader(f"Q: {q['question_text']}")
+    if view['question_text']:
+        st.subheader(f"Q: {view['question_text']}")
         
         if is_ghost:
             st.info("Players are typing answers now...")
+        elif view['submitted']:
+            st.success("Answer sent! Waiting for others...")
         else:
-            # Check if submitted
-            def check_input():
-                return conn.table("player_inputs").select("*").eq("question_id", q_id).eq("user_id", user_id).execute().data
-            existing = run_safe(check_input)
-            
-            if existing:
-                st.success("Answer sent! Waiting for others...")
-            else:
-                ans = st.text_input("Type your bluff:")
-                if st.button("Submit"):
-                    def send_input():
-                        conn.table("player_inputs").insert({"user_id": user_id, "question_id": q_id, "answer_text": ans}).execute()
-                    run_safe(send_input)
-                    st.rerun()
+            ans = st.text_input("Type your bluff:")
+            if st.button("Submit"):
+                # A double tap or retry finds the stored row instead of adding another
+                if submit_input(q_id, ans):
+                    log_sink.log(room, q_id, INPUT_SUBMITTED, {"user_id": user_id, "answer_text": ans})
+                    publish(topic(room, "player_inputs"))
+                st.rerun()
 
 # --- PHASE: VOTING ---
 elif phase == "VOTING":
-    q = get_current_question(q_id)
-    if q:
-        st.subheader(f"Q: {q['question_text']}")
+    if view['question_text']:
+        st.subheader(f"Q: {view['question_text']}")
+        # The round's shared ballot: deduplicated options with stable ids
+        options = view['options'] or []
         
         if is_ghost:
             st.info("Players are voting now...")
             # Show options for ghost to see
-            def get_all_inputs():
-                return conn.table("player_inputs").select("answer_text").eq("question_id", q_id).execute().data
-            bluffs = run_safe(get_all_inputs) or []
-            
-            # Deduplication Logic
-            raw_options = [b['answer_text'] for b in bluffs] + [q['correct_answer']]
-            unique_options = list(set(raw_options))
-            st.write("Current Options:", unique_options)
+            st.write("Current Options:", [o['text'] for o in options])
 
+        elif view['voted']:
+            st.success("Vote cast! Waiting for results...")
         else:
-            # Player Voting Logic
-            def check_vote():
-                return conn.table("player_votes").select("*").eq("question_id", q_id).eq("user_id", user_id).execute().data
-            existing = run_safe(check_vote)
+            # Same order on every rerun / reconnect for this player and round
+            ordered = ballot_order(options, user_id, q_id)
+            option_ids = {o['text']: o['id'] for o in ordered}
             
-            if existing:
-                st.success("Vote cast! Waiting for results...")
-            else:
-                # 1. Fetch Bluffs safely (Empty list if None)
-                def fetch_bluffs():
-                    return conn.table("player_inputs").select("answer_text").eq("question_id", q_id).execute().data
-                bluffs = run_safe(fetch_bluffs) or []
-                
-                # 2. Create Deduplicated List (The Fix)
-                # We use set() to automatically remove identical strings
-                raw_options = [b['answer_text'] for b in bluffs] + [q['correct_answer']]
-                unique_options = list(set(raw_options))
-                
-                # 3. Shuffle consistently
-                if f"shuffled_{q_id}" not in st.session_state:
-                    random.shuffle(unique_options)
-                    st.session_state[f"shuffled_{q_id}"] = unique_options
-                    
-                # 4. Render
-                choice = st.radio("Vote for the real answer:", st.session_state[f"shuffled_{q_id}"])
-                if st.button("Cast Vote"):
-                    def send_vote():
-                        conn.table("player_votes").insert({"user_id": user_id, "question_id": q_id, "voted_for": choice}).execute()
-                    run_safe(send_vote)
-                    st.rerun()
+            # Render
+            choice = st.radio("Vote for the real answer:", [o['text'] for o in ordered])
+            if st.button("Cast Vote"):
+                if cast_vote(q_id, option_ids.get(choice), choice):
+                    log_sink.log(room, q_id, VOTE_CAST, {"user_id": user_id, "option_id": option_ids.get(choice), "voted_for": choice})
+                    publish(topic(room, "player_votes"))
+                st.rerun()
 
 # --- PHASE: RESULTS ---
 elif phase == "RESULTS":
-    q = get_current_question(q_id)
-    if q:
+    if view['question_text']:
         st.balloons()
-        st.success(f"Correct Answer: **{q['correct_answer']}**")
+        st.success(f"Correct Answer: **{view['correct_answer']}**")
         
         # 1. Who wrote what?
         st.markdown("### 🕵️ Who wrote what?")
-        def fetch_authors():
-            return conn.table("player_inputs").select("*").eq("question_id", q_id).execute().data
-        inputs = run_safe(fetch_authors) or []
-        
-        reveal_data = []
-        for i in inputs:
-            reveal_data.append({"Bluff": i['answer_text'], "Author": i['user_id']})
-        st.table(pd.DataFrame(reveal_data))
+        small_table([(i['answer_text'], i['user_id']) for i in view['reveal'] or []], ["Bluff", "Author"])
         
         st.divider()
         
@@ -254,11 +345,8 @@ elif phase == "RESULTS":
         st.markdown("### 🏆 Leaderboard (Top 5)")
         scores = calculate_leaderboard()
         if scores:
-            df = pd.DataFrame(list(scores.items()), columns=["Player", "Score"])
-            df = df.sort_values("Score", ascending=False).head(5)
-            st.dataframe(df, hide_index=True, use_container_width=True)
+            leaderboard(scores, top=5)
 
-# Auto-refresh
-time.sleep(3)
-st.rerun()
+# Auto-refresh: only when the game state moves (phase / question)
+rerun_on_change([topic(room, "game_state")], fallback=3)
 
@@ -0,0 +1,92 @@
+import random
+import threading
+
+# ==========================================
+# 📚 QUESTION BANK (search + paging for the admin LOBBY)
+# ==========================================
+# The LOBBY never loads the whole questions table: searches run server-side
+# (ilike on question_text, ordered by id, one page per query with an exact
+# count), and titles seen so far are kept in an id -> text map so pickers
+# can label ids without scanning lists.
+#
+# Question files prefix every line with its author ("Question from X: ..."),
+# so the author filter is a prefix match on that.
+
+PAGE_SIZE = 25
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_questions(conn, room, text="", author="", page=0, page_size=PAGE_SIZE):
+    """
+    One page of the bank, filtered server-side.
+    text: substring anywhere in the question; author: prefix of the author name.
+    Returns (rows, total) with rows as {id, question_text}.
+    """
+    q = conn.table("questions").select("id, question_text", count="exact").eq("room_id", room)
+    if author.strip():
+        q = q.ilike("question_text", f"Question from {_escape_like(author.strip())}%")
+    if text.strip():
+        q = q.ilike("question_text", f"%{_escape_like(text.strip())}%")
+    start = page * page_size
+    res = q.order("id").range(start, start + page_size - 1).execute()
+    return res.data, res.count or 0
+
+
+class QuestionBank:
+    """id -> question text for one room, filled from search pages and by-id lookups."""
+
+    def __init__(self, room):
+        self.room = room
+        self.titles = {}
+        self._lock = threading.Lock()
+
+    def remember(self, rows):
+        with self._lock:
+            self.titles.update({r['id']: r['question_text'] for r in rows})
+
+    def ensure(self, conn, ids):
+        """Fetches titles for any of `ids` we haven't seen yet (one query)."""
+        missing = [i for i in ids if i not in self.titles]
+        if missing:
+            rows = conn.table("questions").select("id, question_text").in_("id", missing).execute().data
+            self.remember(rows)
+
+    def label(self, q_id):
+        return self.titles.get(q_id, f"#{q_id}")
+
+    def clear(self):
+        with self._lock:
+            self.titles.clear()
+
+
+# ==========================================
+# 🎞️ ROUND PLAYLIST (stored on game_state)
+# ==========================================
+# At game start the chosen questions are frozen into game_state.playlist
+# (ordered ids) with playlist_pos pointing at the current round, so "next"
+# is playlist[pos + 1] and players get "round k of n" from the state row.
+
+def build_playlist(ids, start_id, shuffle=False, rng=None):
+    """
+    Returns (playlist, pos) for a game starting at `start_id`; pos is always 0.
+    In order: `ids` from start_id on (starting mid-bank skips the ones before,
+    so the first round is "Round 1 of n"). Shuffled: start_id first, the rest random.
+    """
+    ids = list(dict.fromkeys(ids))
+    if start_id not in ids:
+        ids.insert(0, start_id)
+    if not shuffle:
+        return ids[ids.index(start_id):], 0
+    rest = [i for i in ids if i != start_id]
+    (rng or random).shuffle(rest)
+    return [start_id] + rest, 0
+
+
+def next_in_playlist(state):
+    """(id, playlist_pos) of the question after the current one, or (None, None) at the end."""
+    playlist = state.get('playlist') or []
+    pos = (state.get('playlist_pos') or 0) + 1
+    return (playlist[pos], pos) if pos < len(playlist) else (None, None)
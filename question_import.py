@@ -0,0 +1,108 @@
+import hashlib
+import requests
+
+# ==========================================
+# 📥 QUESTION IMPORT (streaming + batched + deduped)
+# ==========================================
+# File format: one question per line, "Question text | Correct answer".
+# Everything after the first "|" is the answer. Blank lines are ignored.
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+def iter_lines(source):
+    """Yields (line_no, line) from a URL or a local file without loading it whole."""
+    if source.startswith(("http://", "https://")):
+        with requests.get(source, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            resp.encoding = 'utf-8'
+            for no, line in enumerate(resp.iter_lines(decode_unicode=True), 1):
+                yield no, line.lstrip("\ufeff") if no == 1 else line
+    else:
+        with open(source, encoding="utf-8-sig") as f:
+            for no, line in enumerate(f, 1):
+                yield no, line.rstrip("\r\n")
+
+
+def parse_line(line):
+    """Returns (question, answer), or None if the line isn't a valid question."""
+    if "|" not in line:
+        return None
+    parts = line.split("|")
+    q = parts[0].strip()
+    a = "|".join(parts[1:]).strip()
+    if q and a:
+        return q, a
+    return None
+
+
+def content_hash(question, answer):
+    """Same hash for the same question/answer, ignoring case and extra whitespace."""
+    norm = lambda s: " ".join(s.split()).casefold()
+    return hashlib.sha1(f"{norm(question)}\n{norm(answer)}".encode("utf-8")).hexdigest()
+
+
+def existing_hashes(conn, room=None):
+    q = conn.table("questions").select("question_text, correct_answer")
+    rows = (q.eq("room_id", room) if room else q).execute().data
+    return {content_hash(r['question_text'], r['correct_answer']) for r in rows}
+
+
+def import_questions(conn, source, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, room=None, runner=None):
+    """
+    Streams `source` and bulk-inserts new questions `chunk_size` rows at a time.
+    Questions already in the bank (or repeated in the file) are skipped.
+    With `room`, rows are tagged with that room_id and dedupe is per room.
+    `on_chunk(report)` is called after every insert so the UI can show progress.
+    `runner(op)` runs each chunk insert (e.g. run_safe: a result, or None
+    once it gave up); without it the insert is called directly.
+
+    Returns a report: inserted / duplicates counts, per-chunk sizes, the
+    rejected lines as (line_no, text) and `error`: None, or why the import
+    stopped early. Chunks inserted before that stay in the bank (and in the
+    report), so importing the same file again only adds the rest.
+    """
+    run = runner or (lambda op: op())
+    report = {"inserted": 0, "duplicates": 0, "rejected": [], "chunks": [], "error": None}
+    batch = []
+
+    def flush(line_no):
+        def op():
+            conn.table("questions").insert(batch).execute()
+            return True
+        if not run(op):
+            raise RuntimeError(f"couldn't insert {len(batch)} question(s) read up to line {line_no}")
+        report["inserted"] += len(batch)
+        report["chunks"].append(len(batch))
+        batch.clear()
+        if on_chunk:
+            on_chunk(report)
+
+    try:
+        seen = existing_hashes(conn, room)
+        no = 0
+        for no, line in iter_lines(source):
+            if not line.strip():
+                continue
+            parsed = parse_line(line)
+            if not parsed:
+                report["rejected"].append((no, line))
+                continue
+            q, a = parsed
+            h = content_hash(q, a)
+            if h in seen:
+                report["duplicates"] += 1
+                continue
+            seen.add(h)
+            row = {"question_text": q, "correct_answer": a}
+            if room:
+                row["room_id"] = room
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                flush(no)
+
+        if batch:
+            flush(no)
+    except Exception as e:
+        report["error"] = str(e) or type(e).__name__
+    return report
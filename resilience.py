@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+
+import httpx
+from postgrest.exceptions import APIError
+
+# ==========================================
+# 🛡️ RESILIENCE LAYER (shared by admin.py and player.py)
+# ==========================================
+# run_safe(op) keeps its old contract (result, or None on failure) but:
+#   - only retries errors that can go away by themselves (network, 5xx, DB busy)
+#   - backs off exponentially with full jitter, so sessions don't retry in lockstep
+#   - stops retrying once the current rerun has used up its time budget
+#   - fails fast while the circuit breaker is open (backend looks down)
+
+TRANSIENT_HTTP = {"408", "429", "500", "502", "503", "504", "520"}
+# SQLSTATE classes/codes: connection, resources, operator intervention, serialization, deadlock
+TRANSIENT_SQLSTATE = ("08", "53", "57P", "57014", "40001", "40P01")
+# PostgREST couldn't reach / timed out on the database
+TRANSIENT_PGRST = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+
+def is_transient(exc):
+    if isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return str(exc.response.status_code) in TRANSIENT_HTTP
+    if isinstance(exc, APIError):
+        code = str(exc.code or "")
+        return code in TRANSIENT_HTTP or code in TRANSIENT_PGRST or code.startswith(TRANSIENT_SQLSTATE)
+    return False
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN after `threshold` consecutive transient failures.
+    While OPEN every call fails fast; after `cooldown` seconds one trial call
+    is let through (HALF_OPEN) and its outcome closes or re-opens the circuit.
+    Any answer from the backend, a non-transient error included, counts as a
+    success: the backend is up.
+    """
+
+    def __init__(self, threshold=5, cooldown=5.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "CLOSED"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "OPEN" and self.clock() - self.opened_at >= self.cooldown:
+                self.state = "HALF_OPEN"
+                return True
+            return self.state == "CLOSED"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "CLOSED"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "HALF_OPEN" or self.failures >= self.threshold:
+                self.state = "OPEN"
+                self.opened_at = self.clock()
+
+
+class Resilience:
+    def __init__(self, attempts=3, base_delay=0.2, max_delay=2.0, rerun_budget=4.0,
+                 breaker=None, sleep=time.sleep, rng=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rerun_budget = rerun_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.on_retry = None   # optional hook, e.g. instrument.metrics.record_retry
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "short_circuits": 0,
+                         "give_ups": 0, "latency_total": 0.0, "latency_max": 0.0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # --- per-rerun budget (each Streamlit script run has its own thread) ---
+    def start_rerun(self, budget=None):
+        self._local.deadline = time.monotonic() + (self.rerun_budget if budget is None else budget)
+
+    def _time_left(self):
+        deadline = getattr(self._local, "deadline", None)
+        return float("inf") if deadline is None else deadline - time.monotonic()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def backoff(self, attempt):
+        """Full jitter: uniform in [0, min(max_delay, base * 2^attempt)]."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def run(self, operation):
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            return None
+
+        start = time.monotonic()
+        try:
+            for attempt in range(self.attempts):
+                try:
+                    result = operation()
+                    self.breaker.record_success()
+                    return result
+                except Exception as e:
+                    if not is_transient(e):
+                        # Bad query / missing row: retrying won't help, and it isn't an outage
+                        # (the backend answered, so a HALF_OPEN trial closes the circuit)
+                        self.breaker.record_success()
+                        self._count("failures")
+                        return None
+                    self.breaker.record_failure()
+                    delay = self.backoff(attempt)
+                    if attempt + 1 >= self.attempts or delay > self._time_left() or not self.breaker.allow():
+                        self._count("failures")
+                        self._count("give_ups")
+                        return None
+                    self._count("retries")
+                    if self.on_retry:
+                        self.on_retry()
+                    self.sleep(delay)
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.counters["latency_total"] += elapsed
+                self.counters["latency_max"] = max(self.counters["latency_max"], elapsed)
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+        out["breaker"] = self.breaker.state
+        out["latency_avg"] = round(out["latency_total"] / out["calls"], 4) if out["calls"] else 0.0
+        return out
+
+
+# Module-level instance: one breaker and one set of counters per server process
+resilience = Resilience()
+run_safe = resilience.run
+start_rerun = resilience.start_rerun
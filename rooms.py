@@ -0,0 +1,21 @@
+import re
+
+# ==========================================
+# 🚪 ROOMS (one game per room code)
+# ==========================================
+# Every game table carries a room_id column; all reads, writes, scoring and
+# resets are filtered by it. Existing single-game data lives in room "MAIN".
+
+DEFAULT_ROOM = "MAIN"
+_NOT_ALLOWED = re.compile(r"[^A-Z0-9_-]")
+
+
+def normalize_room(code):
+    """Upper-case letters, digits, '-' and '_' only (max 16); blank -> DEFAULT_ROOM."""
+    code = _NOT_ALLOWED.sub("", (code or "").strip().upper())[:16]
+    return code or DEFAULT_ROOM
+
+
+def topic(room, name):
+    """Change-notification topic for one room, e.g. "MAIN/game_state"."""
+    return f"{room}/{name}"
@@ -0,0 +1,172 @@
+import threading
+
+# ==========================================
+# 🏆 SCORING RULES
+# ==========================================
+CORRECT_POINTS = 10   # Voter picked the real answer
+BLUFF_POINTS = 5      # Bluffer fooled another player
+
+# Postgres hands out identity ids at insert, not at commit: a vote can become
+# visible after one with a higher id. Each refresh re-reads this many ids
+# below the watermark and counts the votes it hasn't seen yet. Only votes
+# in flight at the same moment can land out of order, so a few dozen is plenty.
+VOTE_ID_LAG = 50
+
+
+def apply_votes(scores, votes, q_map, bluff_map, option_map=None):
+    """
+    Adds the points for each vote to `scores` (in place).
+    option_map: ballot option id -> (is_correct, author user_ids)
+    Votes without an option_id (cast before ballots existed) fall back to text:
+    q_map: question_id -> correct answer
+    bluff_map: (question_id, answer_text) -> author user_id
+    """
+    option_map = option_map or {}
+    for v in votes:
+        voter = v['user_id']
+        option = option_map.get(v.get('option_id'))
+        if option is not None:
+            is_correct, authors = option
+        else:
+            qid, choice = v['question_id'], v['voted_for']
+            is_correct = choice == q_map.get(qid)
+            bluffer = bluff_map.get((qid, choice))
+            authors = [bluffer] if bluffer else []
+
+        # 1. Init Voter Score
+        scores[voter] = scores.get(voter, 0)
+
+        # 2. Points for Correct Answer (+10)
+        if is_correct:
+            scores[voter] += CORRECT_POINTS
+
+        # 3. Points for Bluffing Others (+5)
+        for bluffer in authors:
+            if bluffer != voter:
+                scores[bluffer] = scores.get(bluffer, 0) + BLUFF_POINTS
+    return scores
+
+
+def option_entry(row):
+    return bool(row['is_correct']), row['authors'] or []
+
+
+def compute_scores(all_votes, all_inputs, all_qs, all_options=()):
+    """Full recompute from complete table dumps (the original algorithm)."""
+    q_map = {q['id']: q['correct_answer'] for q in all_qs}
+    bluff_map = {(i['question_id'], i['answer_text']): i['user_id'] for i in all_inputs}
+    option_map = {o['id']: option_entry(o) for o in all_options}
+    return apply_votes({}, all_votes, q_map, bluff_map, option_map)
+
+
+# ==========================================
+# ⚡ INCREMENTAL SCORER
+# ==========================================
+class IncrementalScorer:
+    """
+    Keeps running totals and only reads votes added since the last refresh
+    (plus the VOTE_ID_LAG ids below the watermark, for late commits).
+
+    The round's ballot (option id -> correct / authors) is fetched once per
+    question, the first time a vote for it shows up (ballots are frozen once
+    voting starts); answers and bluffs only for votes that predate ballots.
+
+    If the votes behind the watermark disappear (Hard Reset), the totals are
+    rebuilt. That is checked when the caller's `reset_version` moves (the
+    room's reset topic, see notify.py) and when a new round's votes show up
+    (a reset by another server we weren't told about), not on every refresh.
+    """
+
+    def __init__(self, room=None):
+        self.room = room   # only count this room's votes (None = whole table)
+        self._lock = threading.Lock()
+        self.reset_version = None
+        self.reset()
+
+    def reset(self):
+        self.scores = {}
+        self.vote_watermark = 0
+        self.counted = set()   # ids of counted votes within VOTE_ID_LAG of the watermark
+        self.q_map = {}
+        self.bluff_map = {}
+        self.option_map = {}
+        self.known_qids = set()
+
+    def _votes(self, conn, columns):
+        q = conn.table("player_votes").select(columns)
+        return q.eq("room_id", self.room) if self.room else q
+
+    def _was_wiped(self, conn):
+        if not self.vote_watermark:
+            return False
+        old = self._votes(conn, "id").lte("id", self.vote_watermark).limit(1).execute().data
+        return not old
+
+    def _new_votes(self, conn):
+        recent = (
+            self._votes(conn, "id, user_id, question_id, voted_for, option_id")
+            .gt("id", max(0, self.vote_watermark - VOTE_ID_LAG))
+            .order("id")
+            .execute().data
+        )
+        return [v for v in recent if v['id'] not in self.counted]
+
+    def refresh(self, conn, reset_version=None):
+        """
+        Consumes new votes and returns a copy of the current totals.
+        reset_version: changes whenever the room was reset (checked for a wipe then)
+        """
+        with self._lock:
+            if reset_version != self.reset_version:
+                if self._was_wiped(conn):
+                    self.reset()
+                self.reset_version = reset_version
+
+            new_votes = self._new_votes(conn)
+            if not new_votes:
+                return dict(self.scores)
+
+            # Fetch ballots only for questions we haven't seen yet
+            new_qids = list({v['question_id'] for v in new_votes} - self.known_qids)
+            if new_qids and self._was_wiped(conn):
+                # New round after a reset nobody told us about: start over
+                self.reset()
+                new_votes = self._new_votes(conn)
+                new_qids = list({v['question_id'] for v in new_votes})
+                if not new_votes:
+                    return dict(self.scores)
+            q_map, bluff_map, option_map = {}, {}, {}
+            if new_qids:
+                options = (
+                    conn.table("ballot_options")
+                    .select("id, is_correct, authors")
+                    .in_("question_id", new_qids)
+                    .execute().data
+                )
+                option_map = {o['id']: option_entry(o) for o in options}
+
+                # Free-text fallback for votes cast without a ballot
+                legacy_qids = list({v['question_id'] for v in new_votes
+                                    if v['question_id'] in new_qids and v.get('option_id') is None})
+                if legacy_qids:
+                    qs = conn.table("questions").select("id, correct_answer").in_("id", legacy_qids).execute().data
+                    inputs = (
+                        conn.table("player_inputs")
+                        .select("question_id, answer_text, user_id")
+                        .in_("question_id", legacy_qids)
+                        .order("id")
+                        .execute().data
+                    )
+                    q_map = {q['id']: q['correct_answer'] for q in qs}
+                    bluff_map = {(i['question_id'], i['answer_text']): i['user_id'] for i in inputs}
+
+            # Everything fetched -> commit (a failed fetch leaves the totals untouched)
+            self.q_map.update(q_map)
+            self.bluff_map.update(bluff_map)
+            self.option_map.update(option_map)
+            self.known_qids.update(new_qids)
+            apply_votes(self.scores, new_votes, self.q_map, self.bluff_map, self.option_map)
+            self.vote_watermark = max(self.vote_watermark, max(v['id'] for v in new_votes))
+            floor = self.vote_watermark - VOTE_ID_LAG
+            self.counted = {i for i in self.counted if i > floor} | {v['id'] for v in new_votes if v['id'] > floor}
+            return dict(self.scores)
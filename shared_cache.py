@@ -0,0 +1,102 @@
+import threading
+import time
+
+from coalesce import Singleflight
+
+# ==========================================
+# 🗄️ SHARED READ CACHE (one per server process)
+# ==========================================
+class SharedCache:
+    """
+    Small TTL cache shared by every Streamlit session in this process.
+
+    Each entry remembers the cache version it was loaded under. Writers call
+    invalidate() to bump the version, so every session re-fetches on its next
+    read instead of waiting for the TTL to run out.
+
+    Keys are (kind, room, ...) tuples. invalidate_room(room) bumps one
+    room's version: every key of that room misses, other rooms keep theirs.
+
+    Concurrent misses for the same key run the loader once (singleflight):
+    after an invalidate, N waking sessions cost one backend read, not N.
+    """
+
+    def __init__(self, ttl=1.0, coalesce=True):
+        self.ttl = ttl
+        self._flight = Singleflight() if coalesce else None
+        self.version = 0
+        self._room_versions = {}
+        self._key_versions = {}
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _room(key):
+        return key[1] if isinstance(key, tuple) and len(key) > 1 else None
+
+    def _version(self, key):
+        return self.version, self._room_versions.get(self._room(key), 0), self._key_versions.get(key, 0)
+
+    def get(self, key, loader, ttl=None):
+        """Returns the cached value for `key`, calling `loader()` on a miss. None is never cached."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            version = self._version(key)
+            entry = self._entries.get(key)
+            if entry and entry[1] == version and now - entry[2] < ttl:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        if self._flight is not None:
+            # Keyed by version too: a load started before an invalidate() isn't joined after it
+            value = self._flight.do((key, version), loader)
+        else:
+            value = loader()
+        if value is not None:
+            with self._lock:
+                # Don't store a value that was loaded before an invalidate()
+                if version == self._version(key):
+                    self._entries[key] = (value, version, now)
+        return value
+
+    def invalidate(self, *keys):
+        """Drops `keys` (or everything, when called without keys)."""
+        with self._lock:
+            if not keys:
+                self.version += 1
+                self._entries.clear()
+            for key in keys:
+                self._key_versions[key] = self._key_versions.get(key, 0) + 1
+                self._entries.pop(key, None)
+
+    def invalidate_room(self, room):
+        """Drops every key of `room` (keys are (kind, room, ...))."""
+        with self._lock:
+            self._room_versions[room] = self._room_versions.get(room, 0) + 1
+            for key in [k for k in self._entries if self._room(k) == room]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "version": self.version,
+                "entries": len(self._entries),
+                "coalesced": self._flight.stats()["shared"] if self._flight else 0,
+            }
+
+
+# Module-level instance: imported once per process, so admin and player
+# sessions running in the same server all see the same entries.
+shared_cache = SharedCache()
+
+STATE_TTL = 1.0       # game_state changes a few times per round
+QUESTION_TTL = 30.0   # question rows only change on import / reset
+SCORES_TTL = 3.0      # totals; votes cast in this process invalidate them sooner
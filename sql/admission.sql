@@ -0,0 +1,4 @@
+-- Admission queue: pending players are admitted oldest first (see admission.py).
+-- Run once, after sql/rooms.sql.
+alter table players add column if not exists created_at timestamptz not null default now();
+create index if not exists players_queue on players (room_id, status, created_at);
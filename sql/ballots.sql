@@ -0,0 +1,16 @@
+-- Per-round ballots: built once when voting starts (see ballot.py), votes point at an option.
+-- Run once, after sql/rooms.sql and before sql/finalize_bluffs.sql.
+create table if not exists ballot_options (
+  id bigint generated by default as identity primary key,
+  room_id text not null default 'MAIN',
+  question_id bigint not null,
+  option_no int not null,
+  option_text text not null,
+  is_correct boolean not null default false,
+  authors jsonb not null default '[]'::jsonb
+);
+create unique index if not exists ballot_options_question on ballot_options (question_id, option_no);
+create index if not exists ballot_options_room on ballot_options (room_id);
+
+-- voted_for keeps the text for logs / older rows; scoring uses option_id
+alter table player_votes add column if not exists option_id bigint references ballot_options (id) on delete set null;
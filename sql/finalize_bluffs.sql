@@ -0,0 +1,39 @@
+-- Moderation "Save & Start Voting" in one transaction:
+-- apply the edited bluffs, store the round's ballot, log BLUFFS_FINALIZED
+-- and flip the room's phase to VOTING.
+-- p_edits maps player_inputs.id -> new answer_text, e.g. {"12": "Paris"}.
+-- p_ballot is ballot.build_ballot(): [{"option_no", "option_text", "is_correct", "authors"}, ...]
+-- Only acts while the round is still in INPUT, so a retry of a call that
+-- committed but lost its response changes nothing (same ballot ids, one log row).
+drop function if exists finalize_bluffs(bigint, jsonb, text);
+drop function if exists finalize_bluffs(text, bigint, jsonb, text);
+create or replace function finalize_bluffs(p_room_id text, p_question_id bigint, p_edits jsonb, p_details text, p_ballot jsonb)
+returns void
+language plpgsql
+as $$
+begin
+  perform 1 from game_state
+   where room_id = p_room_id and phase = 'INPUT' and current_question_id = p_question_id
+     for update;
+  if not found then
+    return;
+  end if;
+
+  update player_inputs pi
+     set answer_text = e.value
+    from jsonb_each_text(p_edits) e
+   where pi.id = e.key::bigint
+     and pi.room_id = p_room_id;
+
+  delete from ballot_options where question_id = p_question_id;
+  insert into ballot_options (room_id, question_id, option_no, option_text, is_correct, authors)
+  select p_room_id, p_question_id, (o->>'option_no')::int, o->>'option_text',
+         (o->>'is_correct')::boolean, coalesce(o->'authors', '[]'::jsonb)
+    from jsonb_array_elements(p_ballot) o;
+
+  insert into game_logs (room_id, round_id, log_type, details)
+  values (p_room_id, p_question_id, 'BLUFFS_FINALIZED', p_details);
+
+  update game_state set phase = 'VOTING' where room_id = p_room_id;
+end;
+$$;
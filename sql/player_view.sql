@@ -0,0 +1,32 @@
+-- Everything a player rerun needs, in one round trip:
+-- status, phase, question text, round k of n, own submission / vote flags, plus
+-- the round's ballot (VOTING) or correct answer and authors (RESULTS).
+-- Returns null when the room doesn't exist.
+create or replace function player_view(p_room_id text, p_user_id text)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'status', (select status from players where room_id = p_room_id and user_id = p_user_id),
+    'phase', gs.phase,
+    'question_id', gs.current_question_id,
+    'question_text', q.question_text,
+    'round', gs.playlist_pos + 1,
+    'rounds', jsonb_array_length(gs.playlist),
+    'submitted', exists (select 1 from player_inputs
+                          where question_id = gs.current_question_id and user_id = p_user_id),
+    'voted', exists (select 1 from player_votes
+                      where question_id = gs.current_question_id and user_id = p_user_id),
+    'options', case when gs.phase = 'VOTING' then (
+        select coalesce(jsonb_agg(jsonb_build_object('id', id, 'text', option_text) order by option_no), '[]'::jsonb)
+          from ballot_options where question_id = gs.current_question_id) end,
+    'correct_answer', case when gs.phase = 'RESULTS' then q.correct_answer end,
+    'reveal', case when gs.phase = 'RESULTS' then (
+        select coalesce(jsonb_agg(jsonb_build_object('answer_text', answer_text, 'user_id', user_id) order by id), '[]'::jsonb)
+          from player_inputs where question_id = gs.current_question_id) end
+  )
+  from game_state gs
+  left join questions q on q.id = gs.current_question_id
+  where gs.room_id = p_room_id;
+$$;
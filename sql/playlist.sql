@@ -0,0 +1,3 @@
+-- Round playlist: the game's question order, frozen at START GAME, with the current position.
+alter table game_state add column if not exists playlist jsonb not null default '[]'::jsonb;
+alter table game_state add column if not exists playlist_pos int not null default 0;
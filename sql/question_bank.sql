@@ -0,0 +1,4 @@
+-- Question bank search (question_bank.py): substring / author-prefix ilike on
+-- question_text, paged by id within a room. Trigram index serves both patterns.
+create extension if not exists pg_trgm;
+create index if not exists questions_text_trgm on questions using gin (question_text gin_trgm_ops);
@@ -0,0 +1,19 @@
+-- Hard Reset in one transaction / one round trip: back to an empty LOBBY.
+-- The admin archives the room to a local file first (see history.py).
+create or replace function reset_room(p_room_id text)
+returns void
+language plpgsql
+as $$
+begin
+  update game_state
+     set current_question_id = null, phase = 'LOBBY', total_players = 2,
+         playlist = '[]'::jsonb, playlist_pos = 0
+   where room_id = p_room_id;
+  delete from player_votes where room_id = p_room_id;
+  delete from ballot_options where room_id = p_room_id;
+  delete from player_inputs where room_id = p_room_id;
+  delete from game_logs where room_id = p_room_id;
+  delete from players where room_id = p_room_id;
+  delete from questions where room_id = p_room_id;
+end;
+$$;
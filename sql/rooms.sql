@@ -0,0 +1,29 @@
+-- Room-scoped games: every game table gets a room_id, existing rows go to 'MAIN'.
+-- Run once, before sql/finalize_bluffs.sql.
+
+-- game_state: one row per room (new rooms need a generated id)
+alter table game_state add column if not exists room_id text not null default 'MAIN';
+create unique index if not exists game_state_room on game_state (room_id);
+create sequence if not exists game_state_id_seq owned by game_state.id;
+select setval('game_state_id_seq', coalesce((select max(id) from game_state), 1));
+alter table game_state alter column id set default nextval('game_state_id_seq');
+
+-- players: the same nickname may play in several rooms
+alter table players add column if not exists room_id text not null default 'MAIN';
+alter table players drop constraint if exists players_pkey;
+alter table players add primary key (room_id, user_id);
+create index if not exists players_room_status on players (room_id, status);
+
+alter table questions add column if not exists room_id text not null default 'MAIN';
+create index if not exists questions_room on questions (room_id, id);
+
+alter table player_inputs add column if not exists room_id text not null default 'MAIN';
+create index if not exists player_inputs_question on player_inputs (question_id, user_id);
+create index if not exists player_inputs_room on player_inputs (room_id, id);
+
+alter table player_votes add column if not exists room_id text not null default 'MAIN';
+create index if not exists player_votes_question on player_votes (question_id, user_id);
+create index if not exists player_votes_room on player_votes (room_id, id);
+
+alter table game_logs add column if not exists room_id text not null default 'MAIN';
+create index if not exists game_logs_room on game_logs (room_id, created_at desc);
@@ -0,0 +1,63 @@
+-- One bluff and one vote per player and question, each written in a single round trip.
+-- Run once, after sql/ballots.sql.
+
+-- Old double taps / retries left duplicates: keep the first row of each.
+delete from player_inputs a using player_inputs b
+ where a.question_id = b.question_id and a.user_id = b.user_id and a.id > b.id;
+delete from player_votes a using player_votes b
+ where a.question_id = b.question_id and a.user_id = b.user_id and a.id > b.id;
+
+create unique index if not exists player_inputs_once on player_inputs (question_id, user_id);
+create unique index if not exists player_votes_once on player_votes (question_id, user_id);
+drop index if exists player_inputs_question;
+drop index if exists player_votes_question;
+
+-- Idempotency token of the request that wrote the row: a retry whose first
+-- attempt did land finds its own token and knows the row is its own.
+alter table player_inputs add column if not exists submit_token text;
+alter table player_votes add column if not exists submit_token text;
+
+-- Insert unless the player already answered or the room moved past this
+-- question's INPUT phase; returns the stored row either way (null if none).
+create or replace function submit_input(p_room_id text, p_question_id bigint, p_user_id text,
+                                        p_answer_text text, p_token text)
+returns jsonb
+language sql
+as $$
+  with ins as (
+    insert into player_inputs (room_id, user_id, question_id, answer_text, submit_token)
+    select p_room_id, p_user_id, p_question_id, p_answer_text, p_token
+     where exists (select 1 from game_state
+                    where room_id = p_room_id and phase = 'INPUT' and current_question_id = p_question_id)
+    on conflict (question_id, user_id) do nothing
+    returning *
+  )
+  select to_jsonb(r) from (
+    select * from ins
+    union all
+    select * from player_inputs where question_id = p_question_id and user_id = p_user_id
+  ) r
+  limit 1;
+$$;
+
+-- Same for votes, during the question's VOTING phase.
+create or replace function cast_vote(p_room_id text, p_question_id bigint, p_user_id text,
+                                     p_option_id bigint, p_voted_for text, p_token text)
+returns jsonb
+language sql
+as $$
+  with ins as (
+    insert into player_votes (room_id, user_id, question_id, option_id, voted_for, submit_token)
+    select p_room_id, p_user_id, p_question_id, p_option_id, p_voted_for, p_token
+     where exists (select 1 from game_state
+                    where room_id = p_room_id and phase = 'VOTING' and current_question_id = p_question_id)
+    on conflict (question_id, user_id) do nothing
+    returning *
+  )
+  select to_jsonb(r) from (
+    select * from ins
+    union all
+    select * from player_votes where question_id = p_question_id and user_id = p_user_id
+  ) r
+  limit 1;
+$$;
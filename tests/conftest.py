@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The apps' modules live at the repo root, next to admin.py / player.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
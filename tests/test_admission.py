@@ -0,0 +1,40 @@
+from admission import AdmitPolicy
+
+
+def pending(*names):
+    return [{"user_id": n, "created_at": f"2026-01-01T00:00:{i:02d}"} for i, n in enumerate(names)]
+
+
+def policy(**rules):
+    p = AdmitPolicy()
+    p.configure(True, **rules)
+    return p
+
+
+def test_disabled_policy_admits_nobody():
+    p = AdmitPolicy()
+    p.configure(False, pattern=".*")
+    assert p.select(pending("ann"), 0, None) == []
+
+
+def test_allowlist_or_pattern_in_join_order():
+    p = policy(pattern=r"team-\d+", allowlist={"bob"})
+    queue = list(reversed(pending("team-1", "Bob", "eve", "team-x", "team-22")))
+    assert p.select(queue, 0, None) == ["team-1", "Bob", "team-22"]
+
+
+def test_no_match_admits_nobody():
+    p = policy(pattern="vip-.*", allowlist={"ann"})
+    assert p.select(pending("bob", "cid", "xvip-1"), 0, 10) == []
+    assert policy().select(pending("bob"), 0, 10) == []
+
+
+def test_cap_limits_to_the_seats_left():
+    p = policy(pattern=".*")
+    queue = pending("ann", "bob", "cid", "dan")
+    assert p.select(queue, 1, 3) == ["ann", "bob"]
+    assert p.select(queue, 3, 3) == []
+    assert p.select(queue, 5, 3) == []
+    # Without the cap (or without a total_players value) the whole match goes in
+    assert policy(pattern=".*", use_cap=False).select(queue, 3, 3) == ["ann", "bob", "cid", "dan"]
+    assert p.select(queue, 3, None) == ["ann", "bob", "cid", "dan"]
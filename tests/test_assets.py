@@ -0,0 +1,53 @@
+import io
+import time
+
+import pytest
+from PIL import Image
+
+import assets
+
+
+@pytest.fixture
+def image_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "IMAGE_DIR", str(tmp_path / "Images"))
+    monkeypatch.setattr(assets, "CACHE_DIR", str(tmp_path / "Images" / ".cache"))
+    monkeypatch.setattr(assets, "_images", None)
+    monkeypatch.setattr(assets, "_fetcher", None)
+    (tmp_path / "Images").mkdir()
+    return tmp_path / "Images"
+
+
+def png(path, size=(800, 400)):
+    Image.new("RGBA", size, (255, 0, 0, 128)).save(path, "PNG")
+
+
+def test_local_images_are_slimmed_and_kept(image_dirs):
+    png(image_dirs / "a.png")
+    images = assets.load_waiting_images()
+    assert len(images) == 1
+    assert Image.open(io.BytesIO(images[0])).width == assets.MAX_WIDTH
+    (image_dirs / "a.png").unlink()
+    assert assets.load_waiting_images() is images
+
+
+def test_urls_are_fetched_in_the_background_and_nothing_empty_is_kept(image_dirs, monkeypatch):
+    fetched = []
+
+    def slow_prefetch(urls, folder=None):
+        time.sleep(0.2)
+        fetched.extend(urls)
+
+    monkeypatch.setattr(assets, "prefetch", slow_prefetch)
+    start = time.monotonic()
+    assert assets.load_waiting_images(("http://example.invalid/a.gif",)) == []
+    assert time.monotonic() - start < 0.1
+    # Still downloading -> no second thread
+    assert assets.load_waiting_images(("http://example.invalid/a.gif",)) == []
+    assets._fetcher.join()
+    assert fetched == ["http://example.invalid/a.gif"]
+    # The download got nothing: not cached, and not retried straight away
+    assert assets.load_waiting_images(("http://example.invalid/a.gif",)) == []
+    assert fetched == ["http://example.invalid/a.gif"]
+    # Images dropped in later are picked up
+    png(image_dirs / "b.png", (100, 100))
+    assert len(assets.load_waiting_images(("http://example.invalid/a.gif",))) == 1
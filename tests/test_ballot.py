@@ -0,0 +1,50 @@
+from ballot import build_ballot, ballot_order, normalize_option
+
+
+def inputs(*pairs):
+    return [{"user_id": user, "answer_text": text} for user, text in pairs]
+
+
+def by_text(rows):
+    return {r["option_text"]: r for r in rows}
+
+
+def test_bluffs_merge_after_normalisation():
+    rows = build_ballot("Paris", inputs(("ann", "Lyon"), ("bob", "  lyon "), ("cid", "LYON"), ("dan", "Nice")))
+    assert normalize_option("  LYON ") == normalize_option("lyon")
+    options = by_text(rows)
+    assert set(options) == {"Paris", "Lyon", "Nice"}
+    # The first spelling wins; every author is kept once
+    assert options["Lyon"]["authors"] == ["ann", "bob", "cid"]
+    assert options["Nice"]["authors"] == ["dan"]
+
+
+def test_bluff_matching_the_correct_answer_has_no_authors():
+    rows = build_ballot("The  Eiffel Tower", inputs(("ann", "the eiffel tower"), ("bob", "Big Ben")))
+    options = by_text(rows)
+    assert set(options) == {"The Eiffel Tower", "Big Ben"}
+    correct = options["The Eiffel Tower"]
+    assert correct["is_correct"] and correct["authors"] == []
+    assert [r for r in rows if r["is_correct"]] == [correct]
+
+
+def test_blank_bluffs_and_repeat_authors_are_dropped():
+    rows = build_ballot("Paris", inputs(("ann", "  "), ("bob", None), ("cid", "Rome"), ("cid", "rome")))
+    assert by_text(rows)["Rome"]["authors"] == ["cid"]
+    assert len(rows) == 2
+
+
+def test_options_are_numbered_alphabetically():
+    rows = build_ballot("Zurich", inputs(("ann", "bern"), ("bob", "Aarau")))
+    assert [(r["option_no"], r["option_text"]) for r in rows] == [(1, "Aarau"), (2, "bern"), (3, "Zurich")]
+
+
+def test_ballot_order_is_deterministic_per_player_and_round():
+    options = [{"id": i, "option_text": f"o{i}"} for i in range(1, 9)]
+    first = ballot_order(options, "ann", 7)
+    # Same order whatever order the rows were read in
+    assert ballot_order(list(reversed(options)), "ann", 7) == first
+    assert sorted(o["id"] for o in first) == list(range(1, 9))
+    others = [ballot_order(options, user, 7) for user in ["bob", "cid", "dan"]]
+    assert any(order != first for order in others)
+    assert any(ballot_order(options, "ann", r) != first for r in range(8, 12))
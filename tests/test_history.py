@@ -0,0 +1,37 @@
+import json
+
+from history import GameHistory
+
+
+def ballot_event(round_id, bluffer):
+    ballot = [{"option_text": "truth", "is_correct": True, "authors": []},
+              {"option_text": f"bluff {bluffer}", "is_correct": False, "authors": [bluffer]}]
+    return {"log_type": "BLUFFS_FINALIZED", "round_id": round_id, "details": json.dumps({"ballot": ballot})}
+
+
+def events(snapshot_details):
+    out = []
+    for r, (voter, choice) in enumerate([("ann", "truth"), ("bob", "bluff ann")], 1):
+        out += [
+            {"log_type": "PHASE_CHANGED", "round_id": r, "details": json.dumps({"phase": "INPUT"})},
+            ballot_event(r, "ann"),
+            {"log_type": "VOTE_CAST", "round_id": r, "details": json.dumps({"user_id": voter, "voted_for": choice})},
+            {"log_type": "SCORES_END_ROUND", "round_id": r, "details": snapshot_details(r)},
+        ]
+    for n, e in enumerate(out):
+        e.update(id=n, created_at=f"2026-01-01T00:00:{n:02d}")
+    return out
+
+
+def test_scores_at_uses_the_snapshots():
+    snapshots = {1: {"ann": 10}, 2: {"ann": 15, "bob": 0}}
+    history = GameHistory(events(lambda r: json.dumps(snapshots[r])))
+    assert history.scores_at(1) == {"ann": 10}
+    assert history.scores_at(2) == {"ann": 15, "bob": 0}
+    assert history.who_fooled_whom(2) == {"ann": ["bob"]}
+
+
+def test_null_snapshots_are_skipped_not_zeroed():
+    history = GameHistory(events(lambda r: "null" if r == 2 else json.dumps({"ann": 10})))
+    assert history.snapshots == {1: {"ann": 10}}
+    assert history.scores_at(2) == {"ann": 15, "bob": 0}
@@ -0,0 +1,57 @@
+import json
+import time
+
+from backend import LocalBackend
+from log_sink import LogSink
+
+
+def make_sink(tmp_path, **kwargs):
+    backend = LocalBackend()
+    sink = LogSink(spool_path=str(tmp_path / "spool.jsonl"), runner=lambda op: op(), **kwargs)
+    sink.start(backend)
+    return sink, backend
+
+
+def logged(backend):
+    return [json.loads(r['details']) for r in backend.table("game_logs").select("details").order("id").execute().data]
+
+
+def test_flush_writes_the_batch_the_writer_is_holding(tmp_path):
+    sink, backend = make_sink(tmp_path, flush_interval=30.0)
+    sink.log("MAIN", 1, "VOTE_CAST", {"n": 1})
+    time.sleep(0.1)   # the writer has taken the event and waits for more
+    assert logged(backend) == []
+    start = time.monotonic()
+    assert sink.flush()
+    assert time.monotonic() - start < 5
+    assert logged(backend) == [{"n": 1}]
+    sink.close()
+
+
+def test_flush_keeps_event_order_across_batches(tmp_path):
+    sink, backend = make_sink(tmp_path, batch_size=7, flush_interval=30.0)
+    for n in range(50):
+        sink.log("MAIN", 1, "VOTE_CAST", {"n": n})
+    assert sink.flush()
+    assert logged(backend) == [{"n": n} for n in range(50)]
+    sink.close()
+
+
+def test_flush_without_a_writer_thread_drains_the_queue(tmp_path):
+    backend = LocalBackend()
+    sink = LogSink(spool_path=str(tmp_path / "spool.jsonl"), runner=lambda op: op())
+    sink.conn = backend
+    sink.log("MAIN", 1, "VOTE_CAST", {"n": 1})
+    assert sink.flush()
+    assert logged(backend) == [{"n": 1}]
+
+
+def test_spooled_events_are_replayed_first(tmp_path):
+    sink, backend = make_sink(tmp_path, flush_interval=30.0)
+    sink._spool([{"room_id": "MAIN", "round_id": 1, "log_type": "X", "details": json.dumps({"n": 0}),
+                  "created_at": "2026-01-01T00:00:00.000+00:00"}])
+    sink.log("MAIN", 1, "VOTE_CAST", {"n": 1})
+    assert sink.flush()
+    assert logged(backend) == [{"n": 0}, {"n": 1}]
+    assert not sink.stats()["spool"]
+    sink.close()
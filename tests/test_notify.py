@@ -0,0 +1,72 @@
+import threading
+import time
+
+from notify import ChangeHub
+from shared_cache import shared_cache
+
+
+def test_publish_bumps_only_its_topics():
+    hub = ChangeHub()
+    seen = hub.snapshot()
+    assert hub.publish("MAIN/game_state", "MAIN/players") == {"MAIN/game_state": 1, "MAIN/players": 1}
+    assert hub.changed_since(seen, ["MAIN/game_state"])
+    assert not hub.changed_since(seen, ["SIDE/game_state", "MAIN/player_votes"])
+    assert not hub.changed_since(hub.snapshot(), ["MAIN/game_state"])
+
+
+def test_wait_wakes_on_publish_from_another_thread():
+    hub = ChangeHub()
+    seen = hub.snapshot()
+    timer = threading.Timer(0.05, hub.publish, args=("MAIN/player_votes",))
+    timer.start()
+    start = time.monotonic()
+    assert hub.wait(seen, ["MAIN/player_votes"], timeout=5)
+    assert time.monotonic() - start < 1
+    timer.join()
+
+
+def test_wait_times_out_without_a_matching_publish():
+    hub = ChangeHub()
+    seen = hub.snapshot()
+    hub.publish("SIDE/player_votes")
+    assert not hub.wait(seen, ["MAIN/player_votes"], timeout=0.05)
+
+
+def test_game_state_publish_invalidates_the_shared_read():
+    hub = ChangeHub()
+    loads = []
+    load = lambda: loads.append(1) or {"phase": "LOBBY"}
+    shared_cache.get(("game_state", "T1"), load, ttl=60)
+    shared_cache.get(("game_state", "T1"), load, ttl=60)
+    assert len(loads) == 1
+    hub.publish("T1/game_state")
+    shared_cache.get(("game_state", "T1"), load, ttl=60)
+    assert len(loads) == 2
+
+
+def test_questions_publish_only_invalidates_that_room():
+    hub = ChangeHub()
+    loads = []
+    load = lambda: loads.append(1) or "row"
+    for key in [("questions", "T2", 1), ("bank", "T2", "", "", 0), ("questions", "T3", 2), ("game_state", "T3")]:
+        shared_cache.get(key, load, ttl=60)
+    hub.publish("T2/questions")
+    for key in [("questions", "T3", 2), ("game_state", "T3")]:
+        shared_cache.get(key, load, ttl=60)
+    assert len(loads) == 4
+    for key in [("questions", "T2", 1), ("bank", "T2", "", "", 0)]:
+        shared_cache.get(key, load, ttl=60)
+    assert len(loads) == 6
+
+
+def test_vote_publish_invalidates_that_rooms_scores():
+    hub = ChangeHub()
+    loads = []
+    load = lambda: loads.append(1) or {"ann": 10}
+    for room in ["T4", "T5"]:
+        shared_cache.get(("scores", room), load, ttl=60)
+    hub.publish("T4/player_votes")
+    for room in ["T4", "T5"]:
+        shared_cache.get(("scores", room), load, ttl=60)
+    assert len(loads) == 3
+    assert hub.version("T4/player_votes") == 1 and hub.version("T4/reset") == 0
@@ -0,0 +1,26 @@
+import random
+
+from question_bank import build_playlist, next_in_playlist
+
+
+def test_in_order_playlist_starts_at_the_start_question():
+    playlist, pos = build_playlist([1, 2, 3, 4, 5], 3)
+    assert (playlist, pos) == ([3, 4, 5], 0)
+    assert build_playlist([1, 2, 2, 3], 1) == ([1, 2, 3], 0)
+    # A start question outside the picked set is played first
+    assert build_playlist([1, 2], 9) == ([9, 1, 2], 0)
+
+
+def test_shuffled_playlist_keeps_every_question_once():
+    playlist, pos = build_playlist(list(range(1, 21)), 10, shuffle=True, rng=random.Random(1))
+    assert pos == 0 and playlist[0] == 10
+    assert sorted(playlist) == list(range(1, 21))
+
+
+def test_next_in_playlist_walks_to_the_end():
+    playlist, pos = build_playlist([1, 2, 3, 4], 3)
+    state = {"playlist": playlist, "playlist_pos": pos}
+    assert next_in_playlist(state) == (4, 1)
+    state["playlist_pos"] = 1
+    assert next_in_playlist(state) == (None, None)
+    assert next_in_playlist({"playlist": [], "playlist_pos": 0}) == (None, None)
@@ -0,0 +1,81 @@
+from backend import LocalBackend
+from question_import import import_questions, parse_line
+
+
+def write(tmp_path, lines):
+    path = tmp_path / "questions.txt"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def bank(backend, room="MAIN"):
+    rows = backend.table("questions").select("question_text, correct_answer").eq("room_id", room).order("id").execute().data
+    return [(r['question_text'], r['correct_answer']) for r in rows]
+
+
+def test_parse_line():
+    assert parse_line("Capital of France? | Paris") == ("Capital of France?", "Paris")
+    # Everything after the first "|" is the answer
+    assert parse_line("Pipe? | a | b") == ("Pipe?", "a | b")
+    for bad in ["no separator", "| only an answer", "only a question |", " | "]:
+        assert parse_line(bad) is None
+
+
+def test_malformed_lines_are_rejected_with_their_line_numbers(tmp_path):
+    backend = LocalBackend()
+    source = write(tmp_path, ["Q1 | A1", "", "no separator", "Q2 | A2", "| missing question"])
+    report = import_questions(backend, source, room="MAIN")
+    assert report["inserted"] == 2
+    assert report["rejected"] == [(3, "no separator"), (5, "| missing question")]
+    assert report["error"] is None
+    assert bank(backend) == [("Q1", "A1"), ("Q2", "A2")]
+
+
+def test_duplicates_inside_the_file_and_against_the_bank(tmp_path):
+    backend = LocalBackend()
+    backend.table("questions").insert({"room_id": "MAIN", "question_text": "Old one?", "correct_answer": "Yes"}).execute()
+    source = write(tmp_path, ["Q1 | A1", "  q1 |   a1 ", "OLD ONE? | yes", "Q2 | A2"])
+    report = import_questions(backend, source, room="MAIN")
+    assert (report["inserted"], report["duplicates"]) == (2, 2)
+    assert bank(backend) == [("Old one?", "Yes"), ("Q1", "A1"), ("Q2", "A2")]
+    # Importing the same file again adds nothing
+    again = import_questions(backend, source, room="MAIN")
+    assert (again["inserted"], again["duplicates"]) == (0, 4)
+
+
+def test_dedupe_is_per_room(tmp_path):
+    backend = LocalBackend()
+    source = write(tmp_path, ["Q1 | A1"])
+    import_questions(backend, source, room="MAIN")
+    assert import_questions(backend, source, room="SIDE")["inserted"] == 1
+    assert bank(backend, "SIDE") == [("Q1", "A1")]
+
+
+def test_chunk_boundary(tmp_path):
+    backend = LocalBackend()
+    progress = []
+    source = write(tmp_path, [f"Q{n} | A{n}" for n in range(10)])
+    report = import_questions(backend, source, chunk_size=5, room="MAIN",
+                              on_chunk=lambda r: progress.append(r["inserted"]))
+    # Exactly two full chunks, no empty trailing insert
+    assert report["chunks"] == [5, 5]
+    assert progress == [5, 10]
+    source = write(tmp_path, [f"R{n} | A{n}" for n in range(11)])
+    assert import_questions(backend, source, chunk_size=5, room="MAIN")["chunks"] == [5, 5, 1]
+    assert len(bank(backend)) == 21
+
+
+def test_failed_chunk_keeps_the_earlier_ones(tmp_path):
+    backend = LocalBackend()
+    calls = []
+
+    def runner(op):
+        calls.append(1)
+        # Second insert gives up (like run_safe after its retries)
+        return op() if len(calls) != 2 else None
+
+    source = write(tmp_path, [f"Q{n} | A{n}" for n in range(12)])
+    report = import_questions(backend, source, chunk_size=5, room="MAIN", runner=runner)
+    assert report["inserted"] == 5 and report["chunks"] == [5]
+    assert "line 10" in report["error"]
+    assert len(bank(backend)) == 5
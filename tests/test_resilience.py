@@ -0,0 +1,124 @@
+import httpx
+from postgrest.exceptions import APIError
+
+from backend import LocalBackend
+from resilience import CircuitBreaker, Resilience, is_transient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(attempts=3, threshold=3, cooldown=5.0, seed=0):
+    clock = FakeClock()
+    sleeps = []
+    r = Resilience(attempts=attempts, breaker=CircuitBreaker(threshold, cooldown, clock=clock), sleep=sleeps.append)
+    r.rng.seed(seed)
+    return r, clock, sleeps
+
+
+def failing(exc, times):
+    calls = []
+
+    def op():
+        calls.append(1)
+        if len(calls) <= times:
+            raise exc
+        return "ok"
+    return op, calls
+
+
+def down():
+    raise httpx.ConnectError("down")
+
+
+def missing_row():
+    return [][0]
+
+
+def test_transient_errors_are_retried_with_jittered_backoff():
+    r, _, sleeps = make(attempts=3)
+    op, calls = failing(httpx.ConnectError("blip"), 2)
+    assert r.run(op) == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= r.base_delay and 0 <= sleeps[1] <= r.base_delay * 2
+    assert r.stats()["retries"] == 2
+
+
+def test_non_transient_errors_are_not_retried():
+    r, _, sleeps = make()
+    op, calls = failing(APIError({"message": "no such column", "code": "42703"}), 5)
+    assert r.run(op) is None
+    assert len(calls) == 1 and not sleeps
+
+
+def test_breaker_opens_and_fails_fast():
+    r, _, _ = make(attempts=1, threshold=3)
+    for _ in range(3):
+        assert r.run(down) is None
+    assert r.breaker.state == "OPEN"
+    op, calls = failing(httpx.ConnectError("down"), 0)
+    assert r.run(op) is None and not calls
+    assert r.stats()["short_circuits"] == 1
+
+
+def test_half_open_trial_success_closes_the_circuit():
+    r, clock, _ = make(attempts=1, threshold=1, cooldown=5.0)
+    r.run(down)
+    clock.now += 5.0
+    assert r.run(lambda: "ok") == "ok"
+    assert r.breaker.state == "CLOSED"
+
+
+def test_half_open_trial_transient_failure_reopens():
+    r, clock, _ = make(attempts=1, threshold=1, cooldown=5.0)
+    r.run(down)
+    clock.now += 5.0
+    assert r.run(down) is None
+    assert r.breaker.state == "OPEN"
+
+
+def test_half_open_trial_with_a_non_transient_error_closes_the_circuit():
+    # e.g. get_state for a room without a row: the backend answered, it isn't down
+    r, clock, _ = make(attempts=1, threshold=1, cooldown=5.0)
+    r.run(down)
+    clock.now += 5.0
+    assert r.run(missing_row) is None
+    assert r.breaker.state == "CLOSED"
+    clock.now += 1000
+    assert r.run(lambda: "ok") == "ok"
+
+
+def test_gives_up_when_the_rerun_budget_is_spent():
+    r, _, sleeps = make(attempts=5)
+    r.start_rerun(budget=0)
+    assert r.run(down) is None
+    assert not sleeps and r.stats()["give_ups"] == 1
+
+
+def test_injected_faults_are_transient_and_retried_through():
+    backend = LocalBackend(fault_rate=0.3, seed=1)
+    r, _, sleeps = make(attempts=6, threshold=100)
+    results = [r.run(lambda: backend.table("game_state").select("*").execute().data) for _ in range(50)]
+    assert all(rows and rows[0]['room_id'] == "MAIN" for rows in results)
+    assert sleeps   # some calls did hit a fault
+
+
+def test_a_backend_that_is_down_opens_the_breaker():
+    backend = LocalBackend(fault_rate=1.0, seed=1)
+    try:
+        backend.table("game_state").select("*").execute()
+    except Exception as e:
+        assert is_transient(e)
+    r, _, _ = make(attempts=2, threshold=4)
+    for _ in range(3):
+        r.run(lambda: backend.table("game_state").select("*").execute().data)
+    assert r.breaker.state == "OPEN"
+    before = backend.queries
+    assert r.run(lambda: backend.table("game_state").select("*").execute().data) is None
+    assert backend.queries == before
@@ -0,0 +1,127 @@
+import random
+
+from backend import LocalBackend
+from scoring import IncrementalScorer, compute_scores, VOTE_ID_LAG
+
+
+def dump(backend, table):
+    return backend.table(table).select("*").order("id").execute().data
+
+
+def full_recompute(backend):
+    return compute_scores(dump(backend, "player_votes"), dump(backend, "player_inputs"),
+                          dump(backend, "questions"), dump(backend, "ballot_options"))
+
+
+def play_round(backend, rng, players, legacy=False):
+    """One round: a bluff per player, a ballot (unless `legacy`), one vote per player."""
+    q = backend.table("questions").insert({"question_text": "Q", "correct_answer": "truth"}).execute().data[0]
+    backend.table("player_inputs").insert([
+        {"question_id": q['id'], "user_id": p, "answer_text": f"bluff {p}"} for p in players
+    ]).execute()
+    texts = ["truth"] + [f"bluff {p}" for p in players]
+    votes = []
+    if legacy:
+        for p in players:
+            votes.append({"question_id": q['id'], "user_id": p, "voted_for": rng.choice(texts)})
+    else:
+        opts = backend.table("ballot_options").insert([
+            {"question_id": q['id'], "option_no": n + 1, "option_text": t, "is_correct": n == 0,
+             "authors": [] if n == 0 else [players[n - 1]]} for n, t in enumerate(texts)
+        ]).execute().data
+        for p in players:
+            o = rng.choice(opts)
+            votes.append({"question_id": q['id'], "user_id": p, "option_id": o['id'], "voted_for": o['option_text']})
+    return votes
+
+
+def test_incremental_matches_full_recompute_on_large_games():
+    rng = random.Random(1)
+    backend = LocalBackend()
+    scorer = IncrementalScorer()
+    players = [f"p{n}" for n in range(150)]
+    for r in range(40):
+        votes = play_round(backend, rng, players, legacy=r % 10 == 0)
+        # Refreshes land mid-round too, not only between rounds
+        half = len(votes) // 2
+        backend.table("player_votes").insert(votes[:half]).execute()
+        assert scorer.refresh(backend) == full_recompute(backend)
+        backend.table("player_votes").insert(votes[half:]).execute()
+        assert scorer.refresh(backend) == full_recompute(backend)
+
+
+def test_late_commit_below_the_watermark_is_counted():
+    rng = random.Random(2)
+    backend = LocalBackend()
+    scorer = IncrementalScorer()
+    players = ["ann", "bob", "cid"]
+    votes = play_round(backend, rng, players)
+    # bob's vote got id 1 at insert but commits after cid's (id 3) was read
+    backend.table("player_votes").insert([{**votes[0], "id": 2}, {**votes[2], "id": 3}]).execute()
+    scorer.refresh(backend)
+    backend.table("player_votes").insert({**votes[1], "id": 1}).execute()
+    assert scorer.refresh(backend) == full_recompute(backend)
+    # Already counted votes aren't counted again
+    assert scorer.refresh(backend) == full_recompute(backend)
+
+
+def test_counted_ids_stay_within_the_lag_window():
+    rng = random.Random(3)
+    backend = LocalBackend()
+    scorer = IncrementalScorer()
+    players = [f"p{n}" for n in range(100)]
+    for _ in range(12):
+        backend.table("player_votes").insert(play_round(backend, rng, players)).execute()
+        scorer.refresh(backend)
+    assert scorer.counted and min(scorer.counted) > scorer.vote_watermark - VOTE_ID_LAG
+    assert scorer.refresh(backend) == full_recompute(backend)
+
+
+class CountingBackend:
+    """Counts the tables each query starts from."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.tables = []
+
+    def table(self, name):
+        self.tables.append(name)
+        return self.backend.table(name)
+
+
+def test_refresh_without_new_votes_is_one_read():
+    rng = random.Random(5)
+    backend = CountingBackend(LocalBackend())
+    scorer = IncrementalScorer("MAIN")
+    backend.backend.table("player_votes").insert(play_round(backend.backend, rng, ["ann", "bob"])).execute()
+    scorer.refresh(backend, 0)
+    backend.tables.clear()
+    for _ in range(5):
+        scorer.refresh(backend, 0)
+    # No wipe probe and no ballot reads while nothing happens
+    assert backend.tables == ["player_votes"] * 5
+
+
+def test_hard_reset_rebuilds_the_totals():
+    rng = random.Random(4)
+    backend = LocalBackend()
+    scorer = IncrementalScorer("MAIN")
+    backend.table("player_votes").insert(play_round(backend, rng, ["ann", "bob"])).execute()
+    scorer.refresh(backend, 0)
+    backend.call("reset_room", {"p_room_id": "MAIN"})
+    # The reset topic moved
+    assert scorer.refresh(backend, 1) == {}
+    backend.table("player_votes").insert(play_round(backend, rng, ["cid", "dan"])).execute()
+    assert scorer.refresh(backend, 1) == full_recompute(backend)
+
+
+def test_unannounced_reset_is_caught_on_the_next_round():
+    rng = random.Random(6)
+    backend = LocalBackend()
+    scorer = IncrementalScorer("MAIN")
+    backend.table("player_votes").insert(play_round(backend, rng, ["ann", "bob"])).execute()
+    scorer.refresh(backend)
+    # Reset by another server, no realtime -> no reset_version change
+    backend.call("reset_room", {"p_room_id": "MAIN"})
+    backend.table("player_votes").insert(play_round(backend, rng, ["cid", "dan"])).execute()
+    assert scorer.refresh(backend) == full_recompute(backend)
@@ -0,0 +1,79 @@
+import threading
+
+from backend import LocalBackend
+
+
+def game(phase):
+    """A room on question 1 in `phase`, with one ballot option."""
+    backend = LocalBackend()
+    q = backend.table("questions").insert({"room_id": "MAIN", "question_text": "Q", "correct_answer": "A"}).execute().data[0]
+    backend.table("game_state").update({"phase": phase, "current_question_id": q['id']}).eq("room_id", "MAIN").execute()
+    option = backend.table("ballot_options").insert(
+        {"room_id": "MAIN", "question_id": q['id'], "option_no": 1, "option_text": "A", "is_correct": True, "authors": []}
+    ).execute().data[0]
+    return backend, q['id'], option['id']
+
+
+def bluff(backend, q_id, text, token):
+    return backend.call("submit_input", {"p_room_id": "MAIN", "p_question_id": q_id, "p_user_id": "ann",
+                                         "p_answer_text": text, "p_token": token}).data
+
+
+def vote(backend, q_id, option_id, token):
+    return backend.call("cast_vote", {"p_room_id": "MAIN", "p_question_id": q_id, "p_user_id": "ann",
+                                      "p_option_id": option_id, "p_voted_for": "A", "p_token": token}).data
+
+
+def rows(backend, table):
+    return backend.table(table).select("*").execute().data
+
+
+def test_retry_with_the_same_token_finds_its_own_row():
+    backend, q_id, _ = game("INPUT")
+    first = bluff(backend, q_id, "my bluff", "t1")
+    again = bluff(backend, q_id, "my bluff", "t1")
+    assert first['submit_token'] == again['submit_token'] == "t1"
+    assert len(rows(backend, "player_inputs")) == 1
+
+
+def test_double_click_keeps_the_first_submission():
+    backend, q_id, _ = game("INPUT")
+    bluff(backend, q_id, "first", "t1")
+    stored = bluff(backend, q_id, "second", "t2")
+    # The second click gets the stored row back, not its own
+    assert (stored['answer_text'], stored['submit_token']) == ("first", "t1")
+    assert [r['answer_text'] for r in rows(backend, "player_inputs")] == ["first"]
+
+
+def test_concurrent_clicks_leave_one_row():
+    backend, q_id, option_id = game("VOTING")
+    threads = [threading.Thread(target=vote, args=(backend, q_id, option_id, f"t{n}")) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(rows(backend, "player_votes")) == 1
+
+
+def test_vote_outside_voting_is_rejected():
+    for phase in ["INPUT", "RESULTS"]:
+        backend, q_id, option_id = game(phase)
+        assert vote(backend, q_id, option_id, "t1") is None
+        assert rows(backend, "player_votes") == []
+
+
+def test_vote_for_another_question_is_rejected():
+    backend, q_id, option_id = game("VOTING")
+    assert vote(backend, q_id + 1, option_id, "t1") is None
+    assert rows(backend, "player_votes") == []
+
+
+def test_upsert_fallback_ignores_the_duplicate():
+    backend, q_id, _ = game("INPUT")
+    row = {"room_id": "MAIN", "user_id": "ann", "question_id": q_id, "answer_text": "first", "submit_token": "t1"}
+    upsert = lambda r: backend.table("player_inputs").upsert(r, on_conflict="question_id,user_id", ignore_duplicates=True).execute().data
+    assert upsert(row)[0]['submit_token'] == "t1"
+    second = upsert({**row, "answer_text": "second", "submit_token": "t2"})
+    # Nothing written for the duplicate, so the caller can't mistake it for its own
+    assert not second or second[0]['submit_token'] != "t2"
+    assert [r['answer_text'] for r in rows(backend, "player_inputs")] == ["first"]
@@ -0,0 +1,46 @@
+import re
+
+import streamlit as st
+
+# ==========================================
+# 🧾 SMALL TABLES (no pandas / Arrow on the hot path)
+# ==========================================
+# Leaderboards and reveal lists are a handful of rows redrawn on every
+# rerun. Rendering them as a markdown table skips building a DataFrame and
+# serializing it to Arrow, and keeps pandas out of the apps' startup.
+# Use st.dataframe for anything big, sortable or interactive.
+
+MARKDOWN_SPECIALS = re.compile(r"[\\`*_{}\[\]<>()#+\-.!|~]")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        value = f"{value:g}"
+    # Player names are free text: no markdown inside cells, and a "|" or newline would break the row
+    return MARKDOWN_SPECIALS.sub(r"\\\g<0>", str(value)).replace("\n", " ")
+
+
+def small_table(rows, columns=None):
+    """
+    rows: list of dicts (columns = their keys, first row's order) or of
+    tuples (then `columns` names them). Renders nothing for no rows.
+    """
+    if not rows:
+        return
+    if isinstance(rows[0], dict):
+        columns = columns or list(rows[0])
+        rows = [[r.get(c) for c in columns] for r in rows]
+    lines = [
+        "| " + " | ".join(_cell(c) for c in columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    lines += ["| " + " | ".join(_cell(v) for v in row) + " |" for row in rows]
+    st.markdown("\n".join(lines))
+
+
+def leaderboard(scores, top=None):
+    """Player / Score table, best first (only the first `top` rows if given)."""
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+    small_table(ranked[:top] if top else ranked, ["Player", "Score"])